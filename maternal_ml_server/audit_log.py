@@ -0,0 +1,236 @@
+"""
+Non-blocking audit log of predictions.
+
+`AuditLog.log()` only puts the record on a bounded in-memory queue; a
+background thread drains the queue and writes records in batches to an
+append-only SQLite database in WAL mode. When the queue is full the
+`policy` decides what happens:
+- "block": backpressure. The caller waits up to `block_timeout` seconds
+           (None = indefinitely) for space. If none frees up, the record is
+           rejected: log() returns False and `rejected` is incremented, and
+           the server answers 503 instead of returning an unaudited
+           prediction.
+- "drop":  never waits. The record is discarded and counted in `dropped`.
+           This trades audit completeness for latency, so every drop is
+           also reported as a logged warning (the first one, then every
+           1000th).
+
+Records are queued in memory until written, so a hard crash can still lose
+up to one queue's worth. Remaining records are flushed when `close()` is
+called (registered with atexit by default). A batch that fails to write is
+logged and counted in `dropped`; the writer keeps running, and `stats()`
+reports `writer_alive` (shown by the server's /audit/stats).
+"""
+import atexit
+import json
+import logging
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    model_version TEXT NOT NULL,
+    features TEXT NOT NULL,
+    predicted_label TEXT NOT NULL,
+    probabilities TEXT NOT NULL,
+    latency_ms REAL NOT NULL
+)
+"""
+INSERT = ("INSERT INTO predictions (ts, model_version, features, predicted_label, probabilities, latency_ms) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+POLICIES = ("block", "drop")
+WARN_EVERY = 1000
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _json_safe(value):
+    """Replace NaN/inf (missing features arrive as np.nan) with None, recursively."""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalar -> Python scalar
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def _dumps(value):
+    return json.dumps(_json_safe(value), allow_nan=False, default=str)
+
+
+class AuditLog:
+    def __init__(self, path, max_queue=10000, batch_size=256, flush_interval=0.5,
+                 policy="block", block_timeout=1.0, register_atexit=True):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.rejected = 0
+        self.written = 0
+        self._counter_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        # guards _closed and _in_flight, so close() can wait for log() calls
+        # that passed the closed check before it enqueues the stop sentinel
+        self._state = threading.Condition()
+        self._closed = False
+        self._in_flight = 0
+        self._init_db()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        if register_atexit:
+            atexit.register(self.close)
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def log(self, features, model_version, predicted_label, probabilities, latency_ms, ts=None):
+        """Queue one prediction record; never touches the database.
+
+        Returns False if the record was not queued (dropped or rejected).
+        """
+        with self._state:
+            closed = self._closed
+            if not closed:
+                self._in_flight += 1
+        if closed:
+            self._lose(1, "closed")
+            return False
+        record = (ts if ts is not None else time.time(), model_version, features,
+                  predicted_label, probabilities, latency_ms)
+        try:
+            if self.policy == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            self._lose(1, "queue full")
+            return False
+        finally:
+            with self._state:
+                self._in_flight -= 1
+                self._state.notify_all()
+        return True
+
+    def _lose(self, n, reason):
+        with self._counter_lock:
+            # under "block", records refused by log() are rejected (the caller
+            # answers 503); records lost after log() accepted them are dropped
+            if self.policy == "block" and reason in ("queue full", "closed"):
+                self.rejected += n
+                total = self.rejected
+            else:
+                self.dropped += n
+                total = self.dropped
+        if total == n or total // WARN_EVERY != (total - n) // WARN_EVERY:
+            logger.warning("audit log lost %d record(s) (%s, policy=%s); %d dropped, %d rejected so far",
+                           n, reason, self.policy, self.dropped, self.rejected)
+
+    def _run(self):
+        # sqlite connections may only be used by the thread that created them;
+        # _write() opens (and after a failure reopens) it on this thread
+        conn = None
+        stop = False
+        while not stop:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            if stop:
+                batch.extend(self._drain())
+            if batch:
+                conn = self._write(conn, batch)
+        if conn is not None:
+            conn.close()
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def _write(self, conn, batch):
+        """Write one batch and return the connection to reuse.
+
+        Never raises: if the writer thread died, every log() under "block"
+        would wait out block_timeout and the server would answer 503 forever.
+        A failed batch is logged and counted as dropped, and the connection is
+        reopened for the next one.
+        """
+        try:
+            if conn is None:
+                conn = sqlite3.connect(self.path)
+                conn.execute("PRAGMA synchronous=NORMAL")
+            rows = [(ts, version, _dumps(features), label, _dumps(probs), latency)
+                    for ts, version, features, label, probs, latency in batch]
+            with conn:
+                conn.executemany(INSERT, rows)
+        except Exception:
+            logger.exception("audit log writer failed to write %d record(s)", len(batch))
+            self._lose(len(batch), "write error")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            return None
+        self.written += len(rows)
+        return conn
+
+    def close(self, timeout=10.0):
+        """Stop accepting records, flush everything queued and wait for the writer."""
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+            # records already accepted by log() must be queued before the sentinel
+            self._state.wait_for(lambda: self._in_flight == 0, timeout)
+        # the sentinel must get in even if the queue is full
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            leftover = self._drain()
+            if leftover:
+                self._lose(len(leftover), "writer stopped")
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped,
+                "rejected": self.rejected, "policy": self.policy, "writer_alive": self._thread.is_alive()}
@@ -0,0 +1,85 @@
+"""
+Benchmark the latency the audit log adds to a prediction request.
+
+Compares, per record:
+- queued:      AuditLog.log() (what server.py does)
+- synchronous: INSERT + COMMIT on a WAL SQLite database inside the request
+
+Requests arrive every `interval` seconds (default 100 us, i.e. ~10k req/s
+per worker) so the background writer gets scheduled like it would between
+real requests; use 0 to flood the queue and exercise the queue-full policy
+("block" shows the backpressure wait, "drop" the discarded records).
+
+Run: python bench_audit_log.py [n_requests] [interval_seconds] [block|drop]
+"""
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from audit_log import AuditLog, INSERT, SCHEMA
+
+FEATURES = {"Age": 25, "SystolicBP": 130, "DiastolicBP": 80, "BS": 15.0, "BodyTemp": 98.0, "HeartRate": 86}
+PROBS = {"high risk": 0.91, "low risk": 0.03, "mid risk": 0.06}
+
+
+def percentiles(samples_s):
+    us = sorted(s * 1e6 for s in samples_s)
+    return {
+        "p50": statistics.median(us),
+        "p99": us[int(len(us) * 0.99) - 1],
+        "max": us[-1],
+    }
+
+
+def bench_queued(path, n, interval, policy):
+    audit = AuditLog(path, policy=policy, register_atexit=False)
+    samples = []
+    for _ in range(n):
+        if interval:
+            time.sleep(interval)
+        t0 = time.perf_counter()
+        audit.log(FEATURES, "bench", "high risk", PROBS, 1.0)
+        samples.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    audit.close()
+    close_s = time.perf_counter() - t0
+    return samples, audit.stats(), close_s
+
+
+def bench_sync(path, n, interval):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    samples = []
+    for _ in range(n):
+        if interval:
+            time.sleep(interval)
+        t0 = time.perf_counter()
+        with conn:
+            conn.execute(INSERT, (time.time(), "bench", json.dumps(FEATURES), "high risk", json.dumps(PROBS), 1.0))
+        samples.append(time.perf_counter() - t0)
+    conn.close()
+    return samples
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 1e-4
+    policy = sys.argv[3] if len(sys.argv) > 3 else "block"
+    with tempfile.TemporaryDirectory() as tmp:
+        queued, stats, close_s = bench_queued(os.path.join(tmp, "queued.sqlite3"), n, interval, policy)
+        sync = bench_sync(os.path.join(tmp, "sync.sqlite3"), n, interval)
+    print(f"{n} records, interval={interval * 1e6:.0f} us, policy={policy}")
+    for name, samples in [("queued", queued), ("synchronous", sync)]:
+        p = percentiles(samples)
+        print(f"  {name:<12} p50={p['p50']:8.1f} us  p99={p['p99']:8.1f} us  max={p['max']:9.1f} us")
+    print(f"  queued writer: written={stats['written']} dropped={stats['dropped']} rejected={stats['rejected']} flush on close={close_s * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Precomputed decision-region table for the RF/ET/GB ensemble.
+
+Every tree in the calibrated ensemble sends a sample left when
+`x[feature] <= threshold`, on the scaled input cast to float32 (as sklearn
+does before predicting). Cutting each feature at every threshold used by any
+tree therefore gives a grid of cells where all trees, and so the calibrated
+ensemble, produce constant output. `compile_table()` evaluates
+`ensemble_predict_proba` once per cell; a prediction is then six
+`searchsorted` calls plus one table read.
+
+Storage: every compile writes a fresh `decision_table/build-<time>-<pid>/`
+directory and, once verified, publishes it by atomically replacing the
+`decision_table/CURRENT` pointer file. Files a running server has
+memory-mapped are never rewritten in place; older builds are pruned
+(best-effort, since Windows refuses to delete mapped files). Each build holds:
+- thresholds.npz  per-feature float32 cut points
+- palette.npy     unique probability rows (n_unique x n_classes)
+- cells.npy       palette index per cell, narrowest unsigned dtype, loaded
+                  with mmap_mode="r" so workers share the pages
+- meta.json       grid shape, sizes, model hash and verification results;
+                  written last, so a build without it is incomplete
+
+Palette encoding is the compression: the ensemble takes far fewer distinct
+values than there are cells. zlib/npz compression is not used on cells.npy
+because it would prevent memory-mapping.
+
+Limits: the grid has prod(thresholds per feature + 1) cells, so it is only
+tractable for small ensembles (a few shallow trees per model). It is not
+tractable for the models train_models.py produces. On the bundled CSV, the
+default calibrated RandomForest alone has about 7e10 cells and
+GradientBoosting alone about 2e9, both far above the default
+--max-cells=1e8, and ExtraTrees adds more. For those models the compiler
+reports the grid and exits, and server.py keeps calling the ensemble; use
+--dry-run to see the grid size.
+
+Run `python decision_table.py` next to server.py to (re)build the table.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from drift import FEATURES
+
+THRESHOLDS_FILE = "thresholds.npz"
+PALETTE_FILE = "palette.npy"
+CELLS_FILE = "cells.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+
+
+def iter_trees(model):
+    """Yield every fitted sklearn tree inside a (calibrated) ensemble."""
+    if hasattr(model, "tree_"):
+        yield model
+        return
+    for cc in getattr(model, "calibrated_classifiers_", []):
+        # `estimator` since sklearn 1.2, `base_estimator` before
+        inner = getattr(cc, "estimator", None)
+        if inner is None:
+            inner = getattr(cc, "base_estimator", None)
+        if inner is not None:
+            yield from iter_trees(inner)
+    estimators = getattr(model, "estimators_", None)
+    if estimators is not None:
+        # GradientBoosting stores an (n_stages, K) array of regressors
+        for est in np.ravel(np.asarray(estimators, dtype=object)):
+            yield from iter_trees(est)
+
+
+def _float32_floor(values):
+    """Largest float32 <= each value: for float32 x, x <= t  <=>  x <= floor32(t)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = values.astype(np.float32)
+    above = out.astype(np.float64) > values
+    out[above] = np.nextafter(out[above], np.float32(-np.inf))
+    return out
+
+
+def collect_thresholds(models, n_features=len(FEATURES)):
+    """Sorted, de-duplicated float32 split thresholds per feature over all trees."""
+    per_feature = [[] for _ in range(n_features)]
+    for model in models:
+        for tree in iter_trees(model):
+            t = tree.tree_
+            internal = t.feature >= 0
+            for f, thr in zip(t.feature[internal], t.threshold[internal]):
+                per_feature[f].append(thr)
+    return [np.unique(_float32_floor(v)) if v else np.empty(0, dtype=np.float32)
+            for v in per_feature]
+
+
+def representatives(thresholds):
+    """One float32 point inside each cell of every feature axis.
+
+    Cell i of a feature holds t[i-1] < x <= t[i]; t[i] itself lies in it, and
+    the last cell is represented by the next float32 above the last threshold.
+    """
+    reps = []
+    for t in thresholds:
+        if len(t) == 0:
+            reps.append(np.zeros(1, dtype=np.float32))
+        else:
+            reps.append(np.append(t, np.nextafter(t[-1], np.float32(np.inf))))
+    return reps
+
+
+def grid_shape(thresholds):
+    return tuple(len(t) + 1 for t in thresholds)
+
+
+def new_build_dir(root):
+    path = os.path.join(root, f"build-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    os.makedirs(path)
+    return path
+
+
+def current_build_dir(root):
+    """The published build directory under `root`, or None."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as fh:
+            name = fh.read().strip()
+    except OSError:
+        return None
+    return os.path.join(root, name) if name else None
+
+
+def publish(root, build_dir):
+    """Point CURRENT at `build_dir` atomically, then prune other builds."""
+    tmp = os.path.join(root, f"{CURRENT_FILE}.tmp{os.getpid()}")
+    with open(tmp, "w") as fh:
+        fh.write(os.path.basename(build_dir))
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not name.startswith("build-") or path == build_dir:
+            continue
+        if (not os.path.exists(os.path.join(path, META_FILE))
+                and time.time() - os.path.getmtime(path) < 3600):
+            continue  # probably another compile still in progress
+        # running servers may still map an old build; on Windows that
+        # blocks deletion, and the next publish tries again
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def compile_table(predict_proba, thresholds, out_dir, chunk_size=200_000, max_cells=100_000_000):
+    """Evaluate `predict_proba` once per grid cell and write the table to `out_dir`.
+
+    `out_dir` should be a fresh build directory (see new_build_dir()).
+    """
+    shape = grid_shape(thresholds)
+    n_cells = int(np.prod(shape, dtype=np.float64))
+    if n_cells > max_cells:
+        raise ValueError(f"decision grid {shape} has {n_cells:,} cells, more than max_cells={max_cells:,}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    reps = representatives(thresholds)
+    tmp_path = os.path.join(out_dir, CELLS_FILE + ".tmp")
+    cells = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint32, shape=(n_cells,))
+    palette_ids = {}
+    palette = []
+    start_time = time.perf_counter()
+    for start in range(0, n_cells, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, n_cells))
+        idx = np.unravel_index(flat, shape)
+        X = np.column_stack([reps[f][idx[f]] for f in range(len(shape))]).astype(np.float64)
+        probs = predict_proba(X)
+        uniq, inverse = np.unique(probs, axis=0, return_inverse=True)
+        ids = np.empty(len(uniq), dtype=np.uint32)
+        for i, row in enumerate(uniq):
+            key = row.tobytes()
+            if key not in palette_ids:
+                palette_ids[key] = len(palette)
+                palette.append(row)
+            ids[i] = palette_ids[key]
+        cells[start:start + len(flat)] = ids[np.ravel(inverse)]
+        done = start + len(flat)
+        print(f"  {done:,}/{n_cells:,} cells, {len(palette):,} unique rows, "
+              f"{time.perf_counter() - start_time:.0f}s", end="\r", flush=True)
+    print()
+
+    dtype = np.min_scalar_type(max(len(palette) - 1, 0))
+    np.save(os.path.join(out_dir, CELLS_FILE), np.asarray(cells, dtype=dtype))
+    del cells
+    os.remove(tmp_path)
+    np.save(os.path.join(out_dir, PALETTE_FILE), np.array(palette, dtype=np.float64))
+    np.savez(os.path.join(out_dir, THRESHOLDS_FILE), *thresholds)
+    return DecisionTable.load(out_dir)
+
+
+class DecisionTable:
+    """Constant-time lookup of ensemble probabilities for scaled inputs."""
+
+    def __init__(self, thresholds, palette, cells, meta=None):
+        self.thresholds = thresholds
+        self.palette = palette
+        self.cells = cells
+        self.meta = meta or {}
+        self.shape = grid_shape(thresholds)
+        # row-major strides, so the flat index matches np.unravel_index
+        self._strides = np.cumprod((self.shape[1:] + (1,))[::-1])[::-1].astype(np.int64)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with np.load(os.path.join(path, THRESHOLDS_FILE)) as data:
+            thresholds = [data[f"arr_{i}"] for i in range(len(data.files))]
+        palette = np.load(os.path.join(path, PALETTE_FILE))
+        cells = np.load(os.path.join(path, CELLS_FILE), mmap_mode="r" if mmap else None)
+        meta = {}
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+        return cls(thresholds, palette, cells, meta)
+
+    def cell_index(self, X):
+        # sklearn trees compare float32 inputs, so the lookup must too
+        X = np.asarray(X, dtype=np.float32)
+        flat = np.zeros(len(X), dtype=np.int64)
+        for f, t in enumerate(self.thresholds):
+            flat += np.searchsorted(t, X[:, f], side="left") * self._strides[f]
+        return flat
+
+    def predict_proba(self, X):
+        return self.palette[self.cells[self.cell_index(X)]]
+
+    def is_valid_for(self, model_hash):
+        """True if the table was compiled from this ensemble and verified exact.
+
+        `model_hash` is ensemble.model_hash, a content hash of the model files,
+        weights and classes; the MODEL_VERSION label is not enough, since it
+        can stay the same across retraining.
+        """
+        check = self.meta.get("verification", {})
+        return (self.meta.get("model_hash") == model_hash
+                and check.get("n_points", 0) > 0 and check.get("exact_matches") == check.get("n_points"))
+
+    def nbytes(self):
+        return {
+            "cells": int(self.cells.nbytes),
+            "palette": int(self.palette.nbytes),
+            "thresholds": int(sum(t.nbytes for t in self.thresholds)),
+        }
+
+
+def load_current(root, model_hash):
+    """The published table under `root`, or None if there is none or it is
+    incomplete (no meta.json), unreadable, stale or not verified exact."""
+    build_dir = current_build_dir(root)
+    if not build_dir or not os.path.exists(os.path.join(build_dir, META_FILE)):
+        return None
+    try:
+        table = DecisionTable.load(build_dir)
+    except Exception as e:
+        print(f"Ignoring decision table in {build_dir}: {e!r}")
+        return None
+    return table if table.is_valid_for(model_hash) else None
+
+
+def verification_points(thresholds, X_data, n_random=100_000, seed=0):
+    """Training rows, random points, and points on/just above every threshold."""
+    rng = np.random.default_rng(seed)
+    parts = [np.asarray(X_data, dtype=np.float64)]
+    lo = X_data.min(axis=0) - 1
+    hi = X_data.max(axis=0) + 1
+    parts.append(rng.uniform(lo, hi, size=(n_random, len(thresholds))))
+    for f, t in enumerate(thresholds):
+        if len(t) == 0:
+            continue
+        edges = np.concatenate([t, np.nextafter(t, np.float32(np.inf))]).astype(np.float64)
+        base = X_data[rng.integers(0, len(X_data), size=len(edges))].astype(np.float64)
+        base[:, f] = edges
+        parts.append(base)
+    return np.vstack(parts)
+
+
+def verify(table, predict_proba, X):
+    expected = predict_proba(X)
+    actual = table.predict_proba(X)
+    return {
+        "n_points": int(len(X)),
+        "exact_matches": int(np.all(expected == actual, axis=1).sum()),
+        "max_abs_diff": float(np.max(np.abs(expected - actual))) if len(X) else 0.0,
+        "argmax_mismatches": int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the ensemble into a decision-region table")
+    parser.add_argument("--out", default=None, help="table root directory (default: decision_table/ next to server.py)")
+    parser.add_argument("--max-cells", type=int, default=100_000_000)
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--dry-run", action="store_true", help="only report the grid size")
+    args = parser.parse_args()
+
+    import pandas as pd
+    import ensemble
+
+    root = args.out or os.path.join(ensemble.BASE, "decision_table")
+    thresholds = collect_thresholds([ensemble.rf, ensemble.et, ensemble.gb])
+    shape = grid_shape(thresholds)
+    n_cells = int(np.prod(shape, dtype=np.float64))
+    print("Thresholds per feature: " + ", ".join(f"{f}={len(t)}" for f, t in zip(FEATURES, thresholds)))
+    print(f"Grid shape {shape}: {n_cells:,} cells")
+    if args.dry_run:
+        return
+
+    t0 = time.perf_counter()
+    build_dir = new_build_dir(root)
+    try:
+        table = compile_table(ensemble.ensemble_predict_proba, thresholds, build_dir,
+                              chunk_size=args.chunk_size, max_cells=args.max_cells)
+    except ValueError as e:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        # the grid grows with every threshold of every model; with the
+        # default-sized RF, ET and GB from train_models.py each one alone
+        # exceeds max_cells (see "Limits" in the module docstring)
+        raise SystemExit(f"{e}. A table is only tractable for small ensembles (few shallow trees per "
+                         "model); the server keeps using ensemble_predict_proba")
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    compile_s = time.perf_counter() - t0
+
+    df = pd.read_csv(os.path.join(ensemble.BASE, "Maternal Health Risk Data Set.csv"))
+    X_data = ensemble.scaler.transform(ensemble.imputer.transform(df[FEATURES].to_numpy()))
+    X = verification_points(thresholds, X_data)
+    result = verify(table, ensemble.ensemble_predict_proba, X)
+
+    t0 = time.perf_counter()
+    for row in X_data[:1000]:
+        table.predict_proba(row[None, :])
+    lookup_us = (time.perf_counter() - t0) / min(len(X_data), 1000) * 1e6
+    t0 = time.perf_counter()
+    for row in X_data[:200]:
+        ensemble.ensemble_predict_proba(row[None, :])
+    ensemble_us = (time.perf_counter() - t0) / min(len(X_data), 200) * 1e6
+
+    sizes = table.nbytes()
+    meta = {
+        "model_hash": ensemble.model_hash,
+        "model_version": ensemble.model_version,
+        "features": FEATURES,
+        "classes": ensemble.classes,
+        "shape": list(shape),
+        "n_cells": n_cells,
+        "palette_size": int(len(table.palette)),
+        "cells_dtype": str(table.cells.dtype),
+        "bytes": sizes,
+        "compile_seconds": compile_s,
+        "verification": result,
+        "single_row_us": {"table": lookup_us, "ensemble": ensemble_us},
+    }
+    with open(os.path.join(build_dir, META_FILE), "w") as fh:
+        json.dump(meta, fh, indent=2)
+
+    print(f"Palette: {meta['palette_size']:,} unique probability rows, cells stored as {meta['cells_dtype']}")
+    print("Table size: " + ", ".join(f"{k}={v / 1024:.1f} KB" for k, v in sizes.items())
+          + f" (total {sum(sizes.values()) / 1024 ** 2:.1f} MB)")
+    print(f"Verification: {result['exact_matches']:,}/{result['n_points']:,} exact, "
+          f"max |diff|={result['max_abs_diff']:.3g}, argmax mismatches={result['argmax_mismatches']}")
+    print(f"Single-row predict: table {lookup_us:.1f} us vs ensemble {ensemble_us:.1f} us")
+    if result["exact_matches"] != result["n_points"]:
+        del table
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise SystemExit("decision table does not reproduce ensemble_predict_proba exactly; not published")
+    publish(root, build_dir)
+    print(f"Published {build_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+Streaming input-drift sketches for the maternal risk prediction server.
+
+Every request updates a small, fixed-size summary per feature:
+- a log-bucketed quantile sketch (relative error bounded by `alpha`)
+- a histogram over bin edges taken from the training data
+- counts of missing / non-numeric values
+
+Sketches are plain counters, so states from several worker processes can be
+merged by adding them together. Each worker periodically writes its state to
+a shared directory from a background thread, and the /drift endpoint merges
+the states of all live workers before comparing against the reference
+snapshot saved by train_models.py.
+"""
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+import weakref
+from bisect import bisect_right
+
+FEATURES = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate"]
+REPORT_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+PSI_WARN = 0.1
+PSI_DRIFT = 0.2
+# Relative accuracy of each quantile sketch. A bucket is about 2*alpha*x
+# wide, so narrow-range features need a small alpha: 0.0002 gives ~0.04 F
+# buckets for BodyTemp around 98 F. Bucket counts stay in the low hundreds
+# over each feature's physiological range.
+SKETCH_ALPHA = {
+    "Age": 0.005,
+    "SystolicBP": 0.002,
+    "DiastolicBP": 0.002,
+    "BS": 0.002,
+    "BodyTemp": 0.0002,
+    "HeartRate": 0.002,
+}
+
+
+def _to_float(value):
+    """Return value as a finite float, or None if it is missing / not numeric."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return value
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with log-spaced buckets (DDSketch style).
+
+    Values <= `min_value` (no physiological feature should hit this) are
+    counted in a single low bucket and reported as the observed minimum.
+    When more than `max_buckets` buckets exist the lowest ones are collapsed,
+    which keeps memory constant at the cost of accuracy in the far low tail.
+    """
+
+    def __init__(self, alpha=0.01, max_buckets=1024, min_value=1e-9):
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.low_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= self.min_value:
+            self.low_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        extra = len(keys) - self.max_buckets
+        target = keys[extra]
+        for key in keys[:extra]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge quantile sketches with different alpha")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.low_count += other.low_count
+        self.count += other.count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.low_count
+        if seen > rank:
+            return self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            "max_buckets": self.max_buckets,
+            "min_value": self.min_value,
+            "buckets": {str(k): n for k, n in self.buckets.items()},
+            "low_count": self.low_count,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d["alpha"], d["max_buckets"], d["min_value"])
+        sketch.buckets = {int(k): n for k, n in d["buckets"].items()}
+        sketch.low_count = d["low_count"]
+        sketch.count = d["count"]
+        sketch.min = d["min"]
+        sketch.max = d["max"]
+        return sketch
+
+
+class Histogram:
+    """Counts over fixed bin edges; bin i holds edges[i-1] <= x < edges[i]."""
+
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+
+    def add(self, value):
+        self.counts[bisect_right(self.edges, value)] += 1
+
+    def merge(self, other):
+        if other.edges != self.edges:
+            raise ValueError("cannot merge histograms with different bin edges")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self):
+        return {"edges": self.edges, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, d):
+        hist = cls(d["edges"])
+        hist.counts = list(d["counts"])
+        return hist
+
+
+class FeatureSketch:
+    """All streaming statistics kept for a single input feature."""
+
+    def __init__(self, edges, alpha=0.01):
+        self.seen = 0
+        self.missing = 0
+        self.total = 0.0
+        self.quantiles = QuantileSketch(alpha)
+        self.histogram = Histogram(edges)
+
+    def add(self, value):
+        self.seen += 1
+        value = _to_float(value)
+        if value is None:
+            self.missing += 1
+            return
+        self.total += value
+        self.quantiles.add(value)
+        self.histogram.add(value)
+
+    def merge(self, other):
+        self.seen += other.seen
+        self.missing += other.missing
+        self.total += other.total
+        self.quantiles.merge(other.quantiles)
+        self.histogram.merge(other.histogram)
+
+    def missing_rate(self):
+        return self.missing / self.seen if self.seen else None
+
+    def mean(self):
+        present = self.seen - self.missing
+        return self.total / present if present else None
+
+    def to_dict(self):
+        return {
+            "seen": self.seen,
+            "missing": self.missing,
+            "total": self.total,
+            "quantiles": self.quantiles.to_dict(),
+            "histogram": self.histogram.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d["histogram"]["edges"])
+        sketch.seen = d["seen"]
+        sketch.missing = d["missing"]
+        sketch.total = d["total"]
+        sketch.quantiles = QuantileSketch.from_dict(d["quantiles"])
+        sketch.histogram = Histogram.from_dict(d["histogram"])
+        return sketch
+
+
+class FeatureSketches:
+    """One FeatureSketch per feature, updated from rows in FEATURES order."""
+
+    def __init__(self, edges):
+        self.features = {f: FeatureSketch(edges[f], SKETCH_ALPHA[f]) for f in FEATURES}
+
+    def add_row(self, row):
+        for f, value in zip(FEATURES, row):
+            self.features[f].add(value)
+
+    def merge(self, other):
+        for f in FEATURES:
+            self.features[f].merge(other.features[f])
+
+    def edges(self):
+        return {f: self.features[f].histogram.edges for f in FEATURES}
+
+    def to_dict(self):
+        return {"features": {f: s.to_dict() for f, s in self.features.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketches = cls({f: [] for f in FEATURES})
+        sketches.features = {f: FeatureSketch.from_dict(d["features"][f]) for f in FEATURES}
+        return sketches
+
+    def save(self, path):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w") as fh:
+            json.dump(self.to_dict(), fh)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def build_reference(rows, n_bins=10):
+    """Build the reference sketches from raw (un-imputed) training rows.
+
+    Histogram edges are the training deciles of each feature, so every
+    reference bin holds roughly the same share of the data.
+    """
+    rows = [list(r) for r in rows]
+    edges = {}
+    for i, f in enumerate(FEATURES):
+        values = sorted(v for v in (_to_float(r[i]) for r in rows) if v is not None)
+        cuts = [values[int(len(values) * k / n_bins)] for k in range(1, n_bins)] if values else []
+        edges[f] = sorted(set(cuts))
+    reference = FeatureSketches(edges)
+    for r in rows:
+        reference.add_row(r)
+    return reference
+
+
+def psi(expected_counts, actual_counts, eps=1e-4):
+    """Population stability index between two histograms over the same bins."""
+    e_total = sum(expected_counts)
+    a_total = sum(actual_counts)
+    if not e_total or not a_total:
+        return None
+    score = 0.0
+    for e, a in zip(expected_counts, actual_counts):
+        e = max(e / e_total, eps)
+        a = max(a / a_total, eps)
+        score += (a - e) * math.log(a / e)
+    return score
+
+
+def compare(reference, live):
+    """Per-feature drift summary of `live` against `reference`."""
+    report = {}
+    for f in FEATURES:
+        ref, cur = reference.features[f], live.features[f]
+        score = psi(ref.histogram.counts, cur.histogram.counts)
+        if score is None:
+            status = "no_data"
+        elif score >= PSI_DRIFT:
+            status = "drift"
+        elif score >= PSI_WARN:
+            status = "warn"
+        else:
+            status = "ok"
+        report[f] = {
+            "status": status,
+            "psi": score,
+            "count": cur.seen,
+            "missing_rate": cur.missing_rate(),
+            "reference_missing_rate": ref.missing_rate(),
+            "mean": cur.mean(),
+            "reference_mean": ref.mean(),
+            "quantiles": {str(q): cur.quantiles.quantile(q) for q in REPORT_QUANTILES},
+            "reference_quantiles": {str(q): ref.quantiles.quantile(q) for q in REPORT_QUANTILES},
+        }
+    return report
+
+
+# Monitors with a state_dir, restarted in forked children by one fork hook.
+# Weak, so a monitor that is no longer used is not kept alive (and its
+# flusher restarted in every later fork) just for having existed.
+_live_monitors = weakref.WeakSet()
+
+
+def _restart_monitors_after_fork():
+    for monitor in list(_live_monitors):
+        monitor._start()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only
+    os.register_at_fork(after_in_child=_restart_monitors_after_fork)
+
+
+class DriftMonitor:
+    """Per-process live sketches plus the training reference they are compared to.
+
+    With `state_dir` set, a background thread writes this process's sketches
+    to `state_dir/worker-<pid>-<token>.json` every `flush_interval` seconds,
+    so requests never serialise or touch the disk. The token is regenerated
+    (and the live sketches reset) in every forked child, so workers forked
+    from a preloaded master do not share a file.
+
+    Time window: each worker's sketches cover everything it has served since
+    it started. `report()` merges the files of all workers refreshed within
+    the last `max_age` seconds; older files (exited workers, earlier server
+    runs) are ignored and deleted. After a restart the previous run's
+    counts therefore age out within `max_age`.
+    """
+
+    def __init__(self, reference_path, state_dir=None, flush_interval=5.0, max_age=600.0):
+        self.reference = None
+        if os.path.exists(reference_path):
+            self.reference = FeatureSketches.load(reference_path)
+        self.state_dir = state_dir
+        self.flush_interval = flush_interval
+        self.max_age = max_age
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            _live_monitors.add(self)
+        self._start()
+
+    def _start(self):
+        """(Re)initialise per-process state; also runs in every forked child."""
+        self._lock = threading.Lock()
+        self._live = self._empty()
+        self._dirty = False
+        self._started_at = time.time()
+        self._state_path = None
+        if self.state_dir:
+            name = f"worker-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            self._state_path = os.path.join(self.state_dir, name)
+            self._wake = threading.Event()
+            # the thread only holds a weak reference, and is woken to exit
+            # once the monitor is collected
+            weakref.finalize(self, self._wake.set)
+            threading.Thread(target=DriftMonitor._flush_loop, name="drift-flusher", daemon=True,
+                             args=(weakref.ref(self), self._state_path, self._wake, self.flush_interval)).start()
+
+    def _empty(self):
+        edges = self.reference.edges() if self.reference else {f: [] for f in FEATURES}
+        return FeatureSketches(edges)
+
+    def update(self, row):
+        with self._lock:
+            self._live.add_row(row)
+            self._dirty = True
+
+    @staticmethod
+    def _flush_loop(ref, path, wake, interval):
+        while not wake.wait(interval):
+            monitor = ref()
+            if monitor is None or path != monitor._state_path:
+                return  # collected, or superseded after a fork
+            monitor.flush()
+            del monitor
+
+    def flush(self):
+        """Write this process's sketches to its state file (off the request path)."""
+        if not self.state_dir:
+            return
+        with self._lock:
+            dirty = self._dirty
+            state = self._live.to_dict() if dirty else None
+            self._dirty = False
+        if state is not None:
+            state["started_at"] = self._started_at
+            tmp = f"{self._state_path}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(state, fh)
+            os.replace(tmp, self._state_path)
+        elif os.path.exists(self._state_path):
+            # nothing new, but keep the file from aging out
+            os.utime(self._state_path)
+
+    def merged(self):
+        """Live sketches merged across every live worker sharing `state_dir`.
+
+        Returns (sketches, number of workers, earliest worker start time).
+        """
+        if not self.state_dir:
+            with self._lock:
+                return FeatureSketches.from_dict(self._live.to_dict()), 1, self._started_at
+        self.flush()
+        merged = self._empty()
+        workers = 0
+        since = None
+        now = time.time()
+        for path in glob.glob(os.path.join(self.state_dir, "worker-*.json")):
+            try:
+                if now - os.path.getmtime(path) > self.max_age:
+                    os.remove(path)
+                    continue
+                with open(path) as fh:
+                    state = json.load(fh)
+                merged.merge(FeatureSketches.from_dict(state))
+            except (OSError, ValueError, KeyError):
+                continue
+            workers += 1
+            started = state.get("started_at")
+            if started is not None and (since is None or started < since):
+                since = started
+        return merged, workers, since
+
+    def report(self):
+        if self.reference is None:
+            return None
+        live, workers, since = self.merged()
+        return {"workers": workers, "since": since, "max_age": self.max_age,
+                "features": compare(self.reference, live)}
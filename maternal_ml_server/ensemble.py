@@ -0,0 +1,49 @@
+"""
+The calibrated RF/ET/GB ensemble and its preprocessing, loaded from the
+joblib files next to this module.
+
+Importing this only reads model files: no threads, databases or state
+directories. server.py and offline tools such as decision_table.py both use
+it, so they always evaluate the same ensemble.
+"""
+import hashlib
+import json
+import os
+
+import joblib
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+MODEL_FILES = ["rf_calibrated.joblib", "et_calibrated.joblib", "gb_calibrated.joblib"]
+
+rf = joblib.load(os.path.join(BASE, "rf_calibrated.joblib"))
+et = joblib.load(os.path.join(BASE, "et_calibrated.joblib"))
+gb = joblib.load(os.path.join(BASE, "gb_calibrated.joblib"))
+scaler = joblib.load(os.path.join(BASE, "scaler.joblib"))
+imputer = joblib.load(os.path.join(BASE, "imputer.joblib"))
+labelencoder = joblib.load(os.path.join(BASE, "labelencoder.joblib"))
+weights = {"rf": 0.3344914083333779, "et": 0.33623049029173746, "gb": 0.3292781013748845}
+classes = labelencoder.classes_.tolist()
+
+
+def ensemble_predict_proba(X):
+    p_rf = rf.predict_proba(X)
+    p_et = et.predict_proba(X)
+    p_gb = gb.predict_proba(X)
+    return weights["rf"]*p_rf + weights["et"]*p_et + weights["gb"]*p_gb
+
+
+def _model_hash():
+    """sha1 over everything ensemble_predict_proba depends on: the rf/et/gb
+    files, the ensemble weights and the class order."""
+    h = hashlib.sha1()
+    for name in MODEL_FILES:
+        with open(os.path.join(BASE, name), "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps({"weights": weights, "classes": classes}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+# model_hash identifies the ensemble's content; MODEL_VERSION is only a label
+# for the audit log and may stay the same across retraining
+model_hash = _model_hash()
+model_version = os.environ.get("MODEL_VERSION") or model_hash[:12]
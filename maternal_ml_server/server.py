@@ -1,35 +1,53 @@
 from flask import Flask, request, jsonify
-import joblib, os, json, numpy as np
-BASE = os.path.dirname(os.path.abspath(__file__))
-rf = joblib.load(os.path.join(BASE, "rf_calibrated.joblib"))
-et = joblib.load(os.path.join(BASE, "et_calibrated.joblib"))
-gb = joblib.load(os.path.join(BASE, "gb_calibrated.joblib"))
-scaler = joblib.load(os.path.join(BASE, "scaler.joblib"))
-imputer = joblib.load(os.path.join(BASE, "imputer.joblib"))
-labelencoder = joblib.load(os.path.join(BASE, "labelencoder.joblib"))
-weights = {"rf": 0.3344914083333779, "et": 0.33623049029173746, "gb": 0.3292781013748845}
-classes = labelencoder.classes_.tolist()
+import os, time, numpy as np
+from drift import DriftMonitor
+from audit_log import AuditLog
+from decision_table import load_current
+from ensemble import BASE, scaler, imputer, classes, ensemble_predict_proba, model_hash, model_version
 
-def ensemble_predict_proba(X):
-    p_rf = rf.predict_proba(X)
-    p_et = et.predict_proba(X)
-    p_gb = gb.predict_proba(X)
-    return weights["rf"]*p_rf + weights["et"]*p_et + weights["gb"]*p_gb
+audit_log = AuditLog(os.environ.get("AUDIT_LOG_PATH", os.path.join(BASE, "audit_log.sqlite3")),
+                     policy=os.environ.get("AUDIT_LOG_POLICY", "block"),
+                     block_timeout=float(os.environ.get("AUDIT_LOG_BLOCK_TIMEOUT", "1.0")))
+# optional precompiled lookup table (see decision_table.py); a missing, partial,
+# stale or unverified table must never stop the server, it just isn't used
+decision_table = load_current(os.path.join(BASE, "decision_table"), model_hash)
+drift_monitor = DriftMonitor(os.path.join(BASE, "drift_reference.json"),
+                             state_dir=os.environ.get("DRIFT_STATE_DIR", os.path.join(BASE, "drift_state")))
 
 from flask import Flask, request, jsonify
 app = Flask(__name__)
 
 @app.route("/predict", methods=["POST"])
 def predict():
+    start = time.perf_counter()
     data = request.json
     feature_order = ["Age","SystolicBP","DiastolicBP","BS","BodyTemp","HeartRate"]
-    X = np.array([[data.get(f, np.nan) for f in feature_order]])
+    row = [data.get(f, np.nan) for f in feature_order]
+    drift_monitor.update(row)
+    X = np.array([row])
     X = imputer.transform(X)
     X = scaler.transform(X)
-    probs = ensemble_predict_proba(X)[0]
+    probs = (decision_table.predict_proba(X) if decision_table is not None else ensemble_predict_proba(X))[0]
     pred_idx = int(np.argmax(probs))
     pred_label = classes[pred_idx]
-    return jsonify({"predicted_label": pred_label, "probabilities": {classes[i]: float(probs[i]) for i in range(len(classes))}})
+    probabilities = {classes[i]: float(probs[i]) for i in range(len(classes))}
+    latency_ms = (time.perf_counter() - start) * 1000
+    if not audit_log.log(dict(zip(feature_order, row)), model_version, pred_label, probabilities, latency_ms) \
+            and audit_log.policy == "block":
+        # never hand out a prediction that could not be queued for the audit trail
+        return jsonify({"error": "audit log is full; retry later"}), 503
+    return jsonify({"predicted_label": pred_label, "probabilities": probabilities})
+
+@app.route("/drift", methods=["GET"])
+def drift():
+    report = drift_monitor.report()
+    if report is None:
+        return jsonify({"error": "drift_reference.json not found; rerun train_models.py"}), 503
+    return jsonify(report)
+
+@app.route("/audit/stats", methods=["GET"])
+def audit_stats():
+    return jsonify(audit_log.stats())
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
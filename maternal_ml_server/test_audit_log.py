@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from audit_log import AuditLog
+
+FEATURES = {"Age": 25, "SystolicBP": 130, "DiastolicBP": 80, "BS": 15.0, "BodyTemp": 98.0, "HeartRate": 86}
+PROBS = {"high risk": 0.9, "low risk": 0.04, "mid risk": 0.06}
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT features, probabilities FROM predictions ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def stalled_writer(monkeypatch):
+    """Keep the writer thread from draining the queue until the event is set."""
+    release = threading.Event()
+    original = AuditLog._run
+
+    def run(self):
+        release.wait(10)
+        original(self)
+
+    monkeypatch.setattr(AuditLog, "_run", run)
+    yield release
+    release.set()
+
+
+def test_close_writes_every_queued_record(tmp_path):
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, batch_size=64, flush_interval=60, register_atexit=False)
+    for i in range(1000):
+        assert audit.log(dict(FEATURES, Age=i), "v1", "high risk", PROBS, 1.0)
+    audit.close()
+
+    stored = rows(path)
+    assert len(stored) == 1000
+    assert [json.loads(f)["Age"] for f, _ in stored] == list(range(1000))
+    assert audit.stats()["written"] == 1000
+
+
+def test_drop_policy_counts_records_discarded_when_full(tmp_path, stalled_writer):
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, max_queue=5, policy="drop", register_atexit=False)
+    results = [audit.log(FEATURES, "v1", "high risk", PROBS, 1.0) for _ in range(8)]
+    assert results == [True] * 5 + [False] * 3
+    assert audit.dropped == 3
+    assert audit.rejected == 0
+
+    stalled_writer.set()
+    audit.close()
+    assert len(rows(path)) == 5
+    assert audit.stats()["written"] == 5
+
+
+def test_block_policy_rejects_after_timeout(tmp_path, stalled_writer):
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, max_queue=2, policy="block", block_timeout=0.01, register_atexit=False)
+    results = [audit.log(FEATURES, "v1", "high risk", PROBS, 1.0) for _ in range(3)]
+    assert results == [True, True, False]
+    assert audit.rejected == 1
+    assert audit.dropped == 0
+
+    stalled_writer.set()
+    audit.close()
+    assert len(rows(path)) == 2
+
+
+def test_log_after_close_is_refused(tmp_path):
+    audit = AuditLog(str(tmp_path / "audit.sqlite3"), register_atexit=False)
+    audit.close()
+    assert not audit.log(FEATURES, "v1", "high risk", PROBS, 1.0)
+
+
+def test_missing_features_are_stored_as_json_null(tmp_path):
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, register_atexit=False)
+    audit.log(dict(FEATURES, Age=float("nan"), BS=float("inf")), "v1", "high risk", PROBS, 1.0)
+    audit.close()
+
+    features, probabilities = rows(path)[0]
+    assert json.loads(features)["Age"] is None
+    assert json.loads(features)["BS"] is None
+    assert "NaN" not in features
+    assert json.loads(probabilities) == PROBS
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        AuditLog(str(tmp_path / "audit.sqlite3"), policy="ignore", register_atexit=False)
+
+
+def test_close_waits_for_records_already_being_logged(tmp_path, stalled_writer):
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, max_queue=1, policy="block", block_timeout=5, register_atexit=False)
+    assert audit.log(FEATURES, "v1", "high risk", PROBS, 1.0)
+
+    # blocks in put() on the full queue while close() runs
+    results = []
+    logger = threading.Thread(target=lambda: results.append(audit.log(FEATURES, "v1", "high risk", PROBS, 1.0)))
+    logger.start()
+    while audit._in_flight == 0:
+        time.sleep(0.001)
+    closer = threading.Thread(target=audit.close)
+    closer.start()
+    stalled_writer.set()
+    logger.join(5)
+    closer.join(5)
+
+    assert results == [True]
+    assert len(rows(path)) == 2
+    assert audit.stats()["written"] == 2
+
+
+def test_writer_survives_unexpected_errors(tmp_path):
+    class Unserialisable:
+        def __str__(self):
+            raise RuntimeError("cannot serialise")
+
+    path = str(tmp_path / "audit.sqlite3")
+    audit = AuditLog(path, flush_interval=0.01, register_atexit=False)
+    assert audit.log({"Age": Unserialisable()}, "v1", "high risk", PROBS, 1.0)
+    deadline = time.monotonic() + 5
+    while audit.dropped == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert audit.dropped == 1
+    assert audit.stats()["writer_alive"]
+
+    assert audit.log(FEATURES, "v1", "high risk", PROBS, 1.0)
+    audit.close()
+    assert len(rows(path)) == 1
+    assert audit.stats()["written"] == 1
+    assert not audit.stats()["writer_alive"]
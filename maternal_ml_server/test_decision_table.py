@@ -0,0 +1,103 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+from decision_table import (META_FILE, _float32_floor, collect_thresholds, compile_table,
+                            current_build_dir, grid_shape, load_current, new_build_dir, publish,
+                            verification_points, verify)
+
+
+@pytest.fixture(scope="module")
+def ensemble():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 6))
+    y = (X[:, 0] + X[:, 3] > 0).astype(int) + (X[:, 1] > 1)
+    models = [CalibratedClassifierCV(m, cv=2).fit(X, y) for m in (
+        RandomForestClassifier(2, max_depth=2, random_state=0),
+        ExtraTreesClassifier(2, max_depth=2, random_state=0),
+        GradientBoostingClassifier(n_estimators=2, max_depth=2, random_state=0),
+    )]
+
+    def predict_proba(X):
+        return sum(w * m.predict_proba(X) for w, m in zip((0.3, 0.4, 0.3), models))
+
+    return models, predict_proba, X
+
+
+def test_float32_floor_boundaries():
+    values = np.array([0.1, -0.1, 1.0, 2.5, 1e-40, np.float32(0.1)], dtype=np.float64)
+    out = _float32_floor(values)
+    assert out.dtype == np.float32
+    assert np.all(out.astype(np.float64) <= values)
+    # the next float32 up is already above the value, so this is the largest float32 <= value
+    assert np.all(np.nextafter(out, np.float32(np.inf)).astype(np.float64) > values)
+    # exactly representable values are kept as they are
+    assert out[2] == 1.0 and out[3] == 2.5 and out[5] == np.float32(0.1)
+
+
+def test_compiled_table_reproduces_ensemble_exactly(ensemble, tmp_path):
+    models, predict_proba, X = ensemble
+    thresholds = collect_thresholds(models)
+    assert int(np.prod(grid_shape(thresholds))) < 2_000_000
+
+    table = compile_table(predict_proba, thresholds, str(tmp_path / "build"))
+    result = verify(table, predict_proba, verification_points(thresholds, X, n_random=5000))
+    assert result["exact_matches"] == result["n_points"]
+    assert result["argmax_mismatches"] == 0
+
+
+def test_compile_refuses_grids_over_max_cells(ensemble, tmp_path):
+    models, predict_proba, _ = ensemble
+    with pytest.raises(ValueError):
+        compile_table(predict_proba, collect_thresholds(models), str(tmp_path / "build"), max_cells=10)
+
+
+def make_build(root, model_hash="abc"):
+    build = new_build_dir(root)
+    thresholds = [np.array([0.0], dtype=np.float32)] * 2
+    np.savez(os.path.join(build, "thresholds.npz"), *thresholds)
+    np.save(os.path.join(build, "palette.npy"), np.array([[1.0, 0.0], [0.0, 1.0]]))
+    np.save(os.path.join(build, "cells.npy"), np.array([0, 1, 1, 0], dtype=np.uint8))
+    with open(os.path.join(build, META_FILE), "w") as fh:
+        json.dump({"model_hash": model_hash, "verification": {"n_points": 4, "exact_matches": 4}}, fh)
+    return build
+
+
+def test_publish_points_current_at_build_and_prunes_old_ones(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    assert current_build_dir(root) is None
+
+    monkeypatch.setattr("decision_table.time.strftime", lambda fmt: "old")
+    old = make_build(root)
+    publish(root, old)
+    assert current_build_dir(root) == old
+
+    monkeypatch.setattr("decision_table.time.strftime", lambda fmt: "new")
+    new = make_build(root)
+    publish(root, new)
+    assert current_build_dir(root) == new
+    assert not os.path.exists(old)
+
+
+def test_load_current_only_returns_complete_current_tables(tmp_path):
+    root = str(tmp_path)
+    assert load_current(root, "abc") is None
+
+    build = make_build(root, model_hash="abc")
+    publish(root, build)
+    table = load_current(root, "abc")
+    assert table is not None
+    assert table.predict_proba(np.array([[-1.0, 1.0]])).tolist() == [[0.0, 1.0]]
+    assert load_current(root, "retrained") is None
+
+    os.remove(os.path.join(build, META_FILE))
+    assert load_current(root, "abc") is None
+
+    # a corrupt meta.json is ignored too, never raised
+    with open(os.path.join(build, META_FILE), "w") as fh:
+        fh.write("{not json")
+    assert load_current(root, "abc") is None
@@ -0,0 +1,169 @@
+import gc
+import json
+import math
+import os
+import random
+import threading
+import weakref
+
+import pytest
+
+import drift
+from drift import (FEATURES, PSI_DRIFT, DriftMonitor, FeatureSketches, Histogram, QuantileSketch,
+                   build_reference, compare, psi)
+
+
+def make_rows(n, seed=0, shift=0.0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        row = [rng.randint(10, 70), rng.gauss(115, 18), rng.gauss(76, 13),
+               rng.uniform(6, 19), rng.choice([98.0, 98.0, 98.0, 100.0, 101.0]), rng.randint(60, 90)]
+        row = [v + shift for v in row]
+        if rng.random() < 0.05:
+            row[rng.randrange(len(row))] = rng.choice([None, float("nan"), "n/a"])
+        rows.append(row)
+    return rows
+
+
+def without_totals(sketches):
+    d = sketches.to_dict()
+    totals = {f: d["features"][f].pop("total") for f in FEATURES}
+    return d, totals
+
+
+def test_merged_sketches_equal_single_sketch():
+    rows = make_rows(3000)
+    edges = build_reference(rows).edges()
+    single = FeatureSketches(edges)
+    for r in rows:
+        single.add_row(r)
+
+    merged = FeatureSketches(edges)
+    for part in (rows[:1000], rows[1000:2500], rows[2500:]):
+        worker = FeatureSketches(edges)
+        for r in part:
+            worker.add_row(r)
+        merged.merge(FeatureSketches.from_dict(json.loads(json.dumps(worker.to_dict()))))
+
+    single_d, single_totals = without_totals(single)
+    merged_d, merged_totals = without_totals(merged)
+    assert merged_d == single_d
+    for f in FEATURES:
+        assert merged_totals[f] == pytest.approx(single_totals[f])
+
+
+def test_missing_and_non_numeric_values_are_counted():
+    sketches = FeatureSketches({f: [] for f in FEATURES})
+    sketches.add_row([None, float("nan"), "abc", True, float("inf"), 80])
+    for f in FEATURES[:5]:
+        assert sketches.features[f].missing_rate() == 1.0
+    assert sketches.features["HeartRate"].missing_rate() == 0.0
+    assert sketches.features["HeartRate"].mean() == 80
+
+
+def test_quantile_sketch_relative_error():
+    sketch = QuantileSketch(alpha=0.01)
+    for v in range(1, 10001):
+        sketch.add(float(v))
+    for q in (0.05, 0.5, 0.95):
+        exact = 1 + q * 9999
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_body_temp_sketch_resolves_clinical_shift():
+    live = FeatureSketches({f: [] for f in FEATURES})
+    for _ in range(100):
+        live.add_row([25, 120, 80, 7, 99.5, 75])
+    assert live.features["BodyTemp"].quantiles.quantile(0.5) == pytest.approx(99.5, abs=0.05)
+
+
+def test_histogram_bins_and_edges():
+    hist = Histogram([1.0, 2.0])
+    for v in (0.5, 1.0, 1.5, 2.0, 5.0):
+        hist.add(v)
+    # bin i holds edges[i-1] <= x < edges[i]
+    assert hist.counts == [1, 2, 2]
+
+    no_edges = Histogram([])
+    no_edges.add(3.0)
+    assert no_edges.counts == [1]
+
+    with pytest.raises(ValueError):
+        hist.merge(Histogram([1.0, 3.0]))
+
+
+def test_psi_edge_cases():
+    assert psi([10, 20, 30], [1, 2, 3]) == pytest.approx(0.0)
+    assert psi([0, 0, 0], [1, 2, 3]) is None
+    assert psi([1, 2, 3], [0, 0, 0]) is None
+    # empty bins on either side are smoothed, never inf/nan
+    score = psi([100, 0, 0], [0, 0, 100])
+    assert math.isfinite(score) and score > PSI_DRIFT
+
+
+def test_compare_flags_shift_and_reports_no_data():
+    reference = build_reference(make_rows(2000))
+    live = FeatureSketches(reference.edges())
+    assert all(r["status"] == "no_data" for r in compare(reference, live).values())
+
+    for r in make_rows(2000, seed=1):
+        r = list(r)
+        if isinstance(r[3], float) and not math.isnan(r[3]):
+            r[3] += 5
+        live.add_row(r)
+    report = compare(reference, live)
+    assert report["BS"]["status"] == "drift"
+    assert report["Age"]["status"] == "ok"
+
+
+def test_monitor_merges_workers_and_prunes_stale_files(tmp_path):
+    ref_path = tmp_path / "reference.json"
+    build_reference(make_rows(500)).save(str(ref_path))
+    state_dir = str(tmp_path / "state")
+
+    a = DriftMonitor(str(ref_path), state_dir=state_dir, flush_interval=3600)
+    b = DriftMonitor(str(ref_path), state_dir=state_dir, flush_interval=3600)
+    for r in make_rows(30, seed=2):
+        a.update(r)
+    for r in make_rows(20, seed=3):
+        b.update(r)
+    b.flush()
+
+    stale = os.path.join(state_dir, "worker-1-deadbeef.json")
+    with open(b._state_path) as fh, open(stale, "w") as out:
+        out.write(fh.read())
+    os.utime(stale, (0, 0))
+
+    report = a.report()
+    assert report["workers"] == 2
+    assert report["features"]["Age"]["count"] == 50
+    assert not os.path.exists(stale)
+
+
+def test_monitor_without_reference_reports_nothing(tmp_path):
+    monitor = DriftMonitor(str(tmp_path / "missing.json"))
+    monitor.update([25, 120, 80, 7, 98, 75])
+    assert monitor.report() is None
+
+
+def test_unused_monitors_are_not_kept_alive_or_restarted_after_fork(tmp_path):
+    ref_path = tmp_path / "reference.json"
+    build_reference(make_rows(100)).save(str(ref_path))
+    monitor = DriftMonitor(str(ref_path), state_dir=str(tmp_path / "state"), flush_interval=3600)
+    assert monitor in drift._live_monitors
+
+    # what the fork hook does in a child: a new state file and fresh sketches
+    first_path = monitor._state_path
+    drift._restart_monitors_after_fork()
+    assert monitor._state_path != first_path
+
+    flushers = [t for t in threading.enumerate() if t.name == "drift-flusher"]
+    ref = weakref.ref(monitor)
+    del monitor
+    gc.collect()
+    assert ref() is None
+    for t in flushers:
+        t.join(5)
+    assert not any(t.is_alive() for t in flushers)
@@ -6,6 +6,7 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
 from sklearn.calibration import CalibratedClassifierCV
+from drift import build_reference
 
 # LOAD DATA
 df = pd.read_csv("Maternal Health Risk Data Set.csv")
@@ -14,6 +15,9 @@ df = pd.read_csv("Maternal Health Risk Data Set.csv")
 X = df[["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate"]]
 y = df["RiskLevel"]
 
+# DRIFT REFERENCE (raw inputs, before imputation, as seen by the server)
+build_reference(X.to_numpy()).save("drift_reference.json")
+
 # IMPUTATION
 imputer = SimpleImputer(strategy="mean")
 X = imputer.fit_transform(X)
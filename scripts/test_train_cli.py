@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+import train_cli
+
+# trimmed `python -X importtime` output of `import train_cli; import csv, decimal`
+IMPORTTIME_SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       137 |        137 |     fnmatch
+import time:       404 |        541 |   glob
+import time:       562 |      23069 | train_cli
+import time:       196 |        196 |   _csv
+import time:       349 |        544 | csv
+import time:      1200 |       1200 |   _decimal
+import time:       300 |       1500 | decimal
+Traceback lines and other stderr output are ignored
+"""
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_cli, 'ROOT', str(tmp_path))
+    return tmp_path
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_manifest_invalidated_by_deleted_input(repo):
+    a = write(repo / 'a.csv', 'a')
+    b = write(repo / 'b.csv', 'b')
+    output = write(repo / 'combined.pkl', 'out')
+    train_cli.write_manifest(output, [a, b])
+    assert train_cli.is_fresh(output, [a, b])
+
+    os.remove(b)
+    assert not train_cli.is_fresh(output, [a])
+
+
+def test_manifest_invalidated_by_input_added_with_older_mtime(repo):
+    a = write(repo / 'a.csv', 'a')
+    output = write(repo / 'combined.pkl', 'out')
+    train_cli.write_manifest(output, [a])
+
+    # e.g. copied in with its original timestamp preserved
+    old = write(repo / 'old.csv', 'old', mtime=1_000_000)
+    assert os.path.getmtime(old) < os.path.getmtime(output)
+    assert not train_cli.is_fresh(output, [a, old])
+
+
+def test_manifest_invalidated_by_changed_or_missing_manifest(repo):
+    a = write(repo / 'a.csv', 'a')
+    output = write(repo / 'combined.pkl', 'out')
+    assert not train_cli.is_fresh(output, [a])
+
+    train_cli.write_manifest(output, [a])
+    write(repo / 'a.csv', 'a, edited')
+    assert not train_cli.is_fresh(output, [a])
+
+    train_cli.write_manifest(output, [a])
+    train_cli.invalidate(output)
+    assert not train_cli.is_fresh(output, [a])
+
+
+def test_parse_importtime_sums_top_level_imports_after_marker():
+    total, count = train_cli._parse_importtime(IMPORTTIME_SAMPLE, 'train_cli')
+    # csv and decimal only; _csv and _decimal are already in their parents' cumulative time
+    assert total == pytest.approx((544 + 1500) / 1e6)
+    assert count == 4
+
+
+def test_parse_importtime_without_marker_counts_nothing():
+    assert train_cli._parse_importtime(IMPORTTIME_SAMPLE, 'missing') == (0.0, 0)
+
+
+def test_no_complete_rows_requires_allow_synthetic():
+    pd = pytest.importorskip('pandas')
+    df = pd.DataFrame({f'c{i}': [1.0 if j == i else None for j in range(5)] for i in range(5)})
+
+    with pytest.raises(SystemExit, match='--allow-synthetic'):
+        train_cli.extract_features_from_real_data(df)
+
+    X, y = train_cli.extract_features_from_real_data(df, allow_synthetic=True)
+    assert len(X) == len(y) == 2000
@@ -0,0 +1,671 @@
+"""
+NutriTrack ML training CLI.
+
+One entry point for the whole training pipeline, split into subcommands:
+
+  ingest          load and combine the CSV datasets in assets/data/
+  features        extract features and risk labels from the combined data
+  train           train the Keras classifier
+  export-tflite   convert the trained model to TensorFlow Lite
+  report          write graphs and a text report of the last training run
+  benchmark       measure interpreter + import time of every subcommand
+
+Heavy libraries (pandas, tensorflow, matplotlib, seaborn, sklearn) are only
+imported inside the subcommand that needs them, so e.g. `features` never
+loads TensorFlow and `--help` loads nothing but the standard library.
+
+Each stage caches its output in outputs/cache/ and the next stage picks it
+up from there. A cached artifact is reused while the manifest stored next
+to it (input names, sizes and mtimes) still matches its inputs; missing or
+stale upstream artifacts are rebuilt automatically, and
+--force rebuilds the requested stage unconditionally. `export-tflite` and
+`report` only use a training run whose manifest matches the current
+features.npz.
+
+Examples:
+  python scripts/train_cli.py features
+  python scripts/train_cli.py train --model detailed --epochs 30
+  python scripts/train_cli.py export-tflite
+  python scripts/train_cli.py report
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from glob import glob
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+OUT_DIR = os.path.join(ROOT, 'assets', 'models')
+DATA_DIR = os.path.join(ROOT, 'assets', 'data')
+RESULTS_DIR = os.path.join(ROOT, 'outputs', 'training_results')
+CACHE_DIR = os.path.join(ROOT, 'outputs', 'cache')
+
+COMBINED_PATH = os.path.join(CACHE_DIR, 'combined.pkl')
+FEATURES_PATH = os.path.join(CACHE_DIR, 'features.npz')
+SPLIT_PATH = os.path.join(CACHE_DIR, 'split.npz')
+HISTORY_PATH = os.path.join(CACHE_DIR, 'history.json')
+PREDICTIONS_PATH = os.path.join(CACHE_DIR, 'predictions.npz')
+EXPORT_PATH = os.path.join(CACHE_DIR, 'export.json')
+SAVED_MODEL_DIR = os.path.join(OUT_DIR, 'saved_model')
+TFLITE_PATH = os.path.join(OUT_DIR, 'model.tflite')
+
+RISK_LABELS = ['Normal', 'Moderate', 'High', 'Severe']
+RISK_COLORS = ['#2ecc71', '#f39c12', '#e74c3c', '#c0392b']
+
+# Third-party modules each subcommand needs. Subcommands load them only
+# through lazy_import(), and `benchmark` times that same call, so this table
+# is the single source of truth for what a subcommand imports.
+SUBCOMMAND_IMPORTS = {
+    'ingest': ['pandas'],
+    'features': ['numpy', 'pandas'],
+    'train': ['numpy', 'sklearn.model_selection', 'tensorflow'],
+    'export-tflite': ['tensorflow'],
+    'report': ['numpy', 'matplotlib.pyplot', 'seaborn', 'sklearn.metrics'],
+    'benchmark': [],
+}
+
+
+def lazy_import(command):
+    """Import and return the modules listed for `command` in SUBCOMMAND_IMPORTS."""
+    return [importlib.import_module(m) for m in SUBCOMMAND_IMPORTS[command]]
+
+
+def banner(title):
+    print("\n" + "=" * 70)
+    print(title)
+    print("=" * 70)
+
+
+def _signature(paths):
+    """Name, size and mtime of every input, keyed by path relative to the repo."""
+    sig = {}
+    for p in sorted(paths):
+        st = os.stat(p)
+        sig[os.path.relpath(p, ROOT)] = [st.st_size, st.st_mtime_ns]
+    return sig
+
+
+def _manifest_path(output):
+    return output + '.manifest.json'
+
+
+def read_manifest(output):
+    try:
+        with open(_manifest_path(output)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(output, inputs, **extra):
+    """Record the exact inputs `output` was built from, next to it."""
+    with open(_manifest_path(output), 'w') as f:
+        json.dump({'inputs': _signature(inputs), **extra}, f, indent=2)
+
+
+def invalidate(output):
+    """Drop the manifest of `output`, so it counts as stale until rebuilt."""
+    try:
+        os.remove(_manifest_path(output))
+    except FileNotFoundError:
+        pass
+
+
+def is_fresh(output, inputs):
+    """True if `output` was built from exactly these inputs.
+
+    Comparing the recorded file list with sizes and mtimes (rather than
+    "newer than every input") also catches deleted inputs and inputs added
+    with an older mtime, e.g. copied with preserved timestamps.
+    """
+    manifest = read_manifest(output)
+    if not os.path.exists(output) or manifest is None:
+        return False
+    return manifest.get('inputs') == _signature(inputs)
+
+
+# ---------------------------------------------------------------------------
+# ingest
+# ---------------------------------------------------------------------------
+
+def ingest(force=False):
+    """Combine all CSV datasets into one cached DataFrame; returns its path."""
+    csv_files = sorted(glob(os.path.join(DATA_DIR, '*.csv')))
+    if not force and is_fresh(COMBINED_PATH, csv_files):
+        print(f"✓ Using cached combined dataset: {COMBINED_PATH}")
+        return COMBINED_PATH
+
+    pd, = lazy_import('ingest')
+
+    banner("INGEST: LOADING REAL DATASETS")
+    print(f"\nFound {len(csv_files)} CSV files:")
+    all_data = []
+    for i, csv_file in enumerate(csv_files, 1):
+        print(f"  {i}. {os.path.basename(csv_file)}")
+        try:
+            df = pd.read_csv(csv_file)
+            print(f"     ✓ Loaded: {len(df)} rows, {len(df.columns)} columns")
+            all_data.append(df)
+        except Exception as e:
+            print(f"     ✗ Error: {e}")
+
+    if all_data:
+        combined_df = pd.concat(all_data, ignore_index=True, sort=False)
+    else:
+        print("\n⚠ No CSV files loaded; `features` will fall back to synthetic data.")
+        combined_df = pd.DataFrame()
+    print(f"\n✓ Combined dataset: {len(combined_df)} rows, {len(combined_df.columns)} columns")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    combined_df.to_pickle(COMBINED_PATH)
+    write_manifest(COMBINED_PATH, csv_files)
+    print(f"✓ Cached: {COMBINED_PATH}")
+    return COMBINED_PATH
+
+
+# ---------------------------------------------------------------------------
+# features
+# ---------------------------------------------------------------------------
+
+def generate_labels_from_features(X):
+    """Generate risk labels from feature values (lower values = higher risk)"""
+    import numpy as np
+
+    feature_avg = X.mean(axis=1)
+    y = np.zeros(X.shape[0], dtype=np.int32)
+    y[feature_avg < 12] = 1  # Moderate
+    y[feature_avg < 8] = 2   # High
+    y[feature_avg < 5] = 3   # Severe
+    return y
+
+
+def gen_synthetic_data(n=2000):
+    """Fallback: Generate synthetic example data"""
+    import numpy as np
+
+    print("\nGenerating synthetic training data...")
+    # features: weight (kg), height (cm), muac (cm), hemoglobin (g/dL), meals (per day)
+    weight = np.random.normal(10.0, 2.5, size=n)
+    height = np.random.normal(80.0, 8.0, size=n)
+    muac = np.random.normal(13.0, 1.5, size=n)
+    hb = np.random.normal(11.5, 1.5, size=n)
+    meals = np.random.randint(2, 6, size=n)
+
+    X = np.stack([weight, height, muac, hb, meals], axis=1).astype(np.float32)
+
+    y = np.zeros((n,), dtype=np.int32)
+    for i in range(n):
+        if muac[i] < 11.5 or hb[i] < 7.0:
+            y[i] = 3  # Severe
+        elif muac[i] < 12.5 or (weight[i] / (height[i]/100) < 10):
+            y[i] = 2  # High
+        elif hb[i] < 11.0 or meals[i] < 3:
+            y[i] = 1  # Moderate
+        else:
+            y[i] = 0  # Normal
+
+    return X, y
+
+
+def extract_features_from_real_data(df, allow_synthetic=False):
+    """Extract the first five numeric columns, normalise to 1-20 and label them"""
+    import numpy as np
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if len(numeric_cols) < 5:
+        print(f"\n⚠ Only {len(numeric_cols)} numeric columns found. Using synthetic data...")
+        return gen_synthetic_data(2000)
+
+    selected_cols = numeric_cols[:5]
+    print(f"\nSelected features ({len(selected_cols)}):")
+    for i, col in enumerate(selected_cols, 1):
+        print(f"  {i}. {col}")
+
+    X = df[selected_cols].dropna().values.astype(np.float32)
+    print(f"\nOriginal data shape: {X.shape}")
+    if len(X) == 0:
+        if not allow_synthetic:
+            raise SystemExit("No rows have all selected features; refusing to train on synthetic "
+                             "data. Pass --allow-synthetic to do so anyway.")
+        print("\n⚠ No rows have all selected features. Using synthetic data (--allow-synthetic)...")
+        return gen_synthetic_data(2000)
+    print("Feature statistics:")
+    for i, col in enumerate(selected_cols):
+        print(f"  {col}: min={X[:, i].min():.2f}, max={X[:, i].max():.2f}, mean={X[:, i].mean():.2f}")
+
+    X_normalized = np.zeros_like(X)
+    for i in range(X.shape[1]):
+        col_min, col_max = X[:, i].min(), X[:, i].max()
+        if col_max > col_min:
+            X_normalized[:, i] = 1 + 19 * (X[:, i] - col_min) / (col_max - col_min)
+        else:
+            X_normalized[:, i] = 10
+
+    return X_normalized, generate_labels_from_features(X_normalized)
+
+
+def features(force=False, allow_synthetic=False):
+    """Build the cached (X, y) feature matrix; returns its path."""
+    combined_path = ingest()
+    cached = read_manifest(FEATURES_PATH) or {}
+    if (not force and is_fresh(FEATURES_PATH, [combined_path])
+            and cached.get('allow_synthetic', False) == allow_synthetic):
+        print(f"✓ Using cached features: {FEATURES_PATH}")
+        return FEATURES_PATH
+
+    np, pd = lazy_import('features')
+
+    banner("FEATURES: FEATURE EXTRACTION")
+    X, y = extract_features_from_real_data(pd.read_pickle(combined_path), allow_synthetic)
+    print(f"\nX: {X.shape}, y: {y.shape}")
+    counts = np.bincount(y, minlength=len(RISK_LABELS))
+    print("Risk distribution: " + ", ".join(f"{label}={n}" for label, n in zip(RISK_LABELS, counts)))
+
+    np.savez_compressed(FEATURES_PATH, X=X, y=y)
+    write_manifest(FEATURES_PATH, [combined_path], allow_synthetic=allow_synthetic)
+    print(f"✓ Cached: {FEATURES_PATH}")
+    return FEATURES_PATH
+
+
+# ---------------------------------------------------------------------------
+# train
+# ---------------------------------------------------------------------------
+
+def build_model(input_shape, variant='simple'):
+    """Build the neural network ('simple' or 'detailed' architecture)"""
+    import tensorflow as tf
+
+    if variant == 'detailed':
+        model = tf.keras.Sequential([
+            tf.keras.layers.Input(shape=(input_shape,)),
+            tf.keras.layers.Dense(64, activation='relu', name='dense_1'),
+            tf.keras.layers.Dropout(0.3),
+            tf.keras.layers.Dense(32, activation='relu', name='dense_2'),
+            tf.keras.layers.Dropout(0.2),
+            tf.keras.layers.Dense(16, activation='relu', name='dense_3'),
+            tf.keras.layers.Dense(4, activation='softmax', name='output')
+        ])
+        optimizer = tf.keras.optimizers.Adam(learning_rate=0.001)
+    else:
+        model = tf.keras.Sequential([
+            tf.keras.layers.Input(shape=(input_shape,)),
+            tf.keras.layers.Dense(32, activation='relu'),
+            tf.keras.layers.Dense(24, activation='relu'),
+            tf.keras.layers.Dense(4, activation='softmax')
+        ])
+        optimizer = 'adam'
+    model.compile(optimizer=optimizer, loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def train(variant='simple', epochs=20, batch_size=32, validation_split=0.15, test_size=0.2,
+          allow_synthetic=False):
+    """Train on the cached features and cache the model, split, test predictions and history.
+
+    All four are written together at the end; the manifest of HISTORY_PATH
+    (over features.npz) is written last and marks them as one complete run,
+    see training_is_fresh().
+    """
+    features_path = features(allow_synthetic=allow_synthetic)
+    # an interrupted run must not leave the previous run looking current
+    invalidate(HISTORY_PATH)
+
+    np, model_selection, _ = lazy_import('train')
+    train_test_split = model_selection.train_test_split
+
+    data = np.load(features_path)
+    X, y = data['X'], data['y']
+
+    banner("TRAIN: DATA SPLIT")
+    if test_size > 0:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=42, stratify=y
+        )
+    else:
+        X_train, X_test, y_train, y_test = X, X[:0], y, y[:0]
+    print(f"\nTraining set: {X_train.shape[0]} samples")
+    print(f"Test set: {X_test.shape[0]} samples")
+
+    banner("TRAIN: MODEL ARCHITECTURE")
+    model = build_model(X.shape[1], variant)
+    model.summary()
+
+    banner("TRAIN: TRAINING")
+    history = model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size,
+                        validation_split=validation_split, verbose=1)
+
+    banner("TRAIN: EVALUATION")
+    metrics = {}
+    train_loss, train_acc = model.evaluate(X_train, y_train, verbose=0)
+    metrics.update(train_loss=train_loss, train_accuracy=train_acc)
+    print(f"\nTraining - Loss: {train_loss:.4f}, Accuracy: {train_acc:.4f}")
+    if len(X_test):
+        test_loss, test_acc = model.evaluate(X_test, y_test, verbose=0)
+        metrics.update(test_loss=test_loss, test_accuracy=test_acc)
+        print(f"Test     - Loss: {test_loss:.4f}, Accuracy: {test_acc:.4f}")
+        y_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
+    else:
+        y_pred = y_test
+
+    model.save(SAVED_MODEL_DIR, include_optimizer=False)
+    print(f"\n✓ Saved TensorFlow model to {SAVED_MODEL_DIR}")
+    np.savez_compressed(SPLIT_PATH, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+    np.savez_compressed(PREDICTIONS_PATH, y_test=y_test, y_pred=y_pred)
+    with open(HISTORY_PATH, 'w') as f:
+        json.dump({'variant': variant, 'history': {k: [float(v) for v in vals]
+                                                   for k, vals in history.history.items()},
+                   'metrics': metrics}, f, indent=2)
+    write_manifest(HISTORY_PATH, [features_path], variant=variant)
+    return SAVED_MODEL_DIR
+
+
+def training_is_fresh():
+    """True if the cached training run is complete and was trained on the current features.npz."""
+    return (is_fresh(HISTORY_PATH, [FEATURES_PATH])
+            and all(os.path.exists(p) for p in (SAVED_MODEL_DIR, SPLIT_PATH, PREDICTIONS_PATH)))
+
+
+# ---------------------------------------------------------------------------
+# export-tflite
+# ---------------------------------------------------------------------------
+
+def export_tflite():
+    """Convert the saved model to TFLite and write labels.txt next to it."""
+    if not training_is_fresh():
+        print(f"No model in {SAVED_MODEL_DIR} trained on the current features; running `train` first.")
+        train()
+
+    tf, = lazy_import('export-tflite')
+
+    banner("EXPORT: CONVERTING TO TFLITE")
+    converter = tf.lite.TFLiteConverter.from_saved_model(SAVED_MODEL_DIR)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS
+    ]
+    try:
+        tflite_model = converter.convert()
+    except Exception as e:
+        print(f"Conversion note: {e}. Using basic conversion...")
+        converter = tf.lite.TFLiteConverter.from_saved_model(SAVED_MODEL_DIR)
+        tflite_model = converter.convert()
+
+    with open(TFLITE_PATH, 'wb') as f:
+        f.write(tflite_model)
+    model_size_kb = os.path.getsize(TFLITE_PATH) / 1024
+    print(f"✓ Saved TFLite model: {TFLITE_PATH} ({model_size_kb:.1f} KB)")
+
+    labels_path = os.path.join(OUT_DIR, 'labels.txt')
+    with open(labels_path, 'w') as f:
+        f.write('\n'.join(RISK_LABELS))
+    print(f"✓ Saved labels: {labels_path}")
+
+    with open(EXPORT_PATH, 'w') as f:
+        json.dump({'tflite_path': TFLITE_PATH, 'model_size_kb': model_size_kb}, f, indent=2)
+    write_manifest(EXPORT_PATH, [HISTORY_PATH])
+    return TFLITE_PATH
+
+
+# ---------------------------------------------------------------------------
+# report
+# ---------------------------------------------------------------------------
+
+def report():
+    """Write graphs and 00_MODEL_REPORT.txt for the last cached training run."""
+    if not training_is_fresh():
+        raise SystemExit(f"No complete training run on the current {FEATURES_PATH}; run `train` first.")
+
+    # headless backend unless the user picked one; must be set before pyplot loads
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    np, plt, sns, metrics = lazy_import('report')
+    confusion_matrix = metrics.confusion_matrix
+    classification_report = metrics.classification_report
+    accuracy_score = metrics.accuracy_score
+    from datetime import datetime
+
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
+    with open(HISTORY_PATH) as f:
+        run = json.load(f)
+    history = run['history']
+    split = np.load(SPLIT_PATH)
+    y_train, y_test = split['y_train'], split['y_test']
+    preds = np.load(PREDICTIONS_PATH)
+    y_pred = preds['y_pred']
+    model_size_kb = None
+    if is_fresh(EXPORT_PATH, [HISTORY_PATH]):  # size of this run's export only
+        with open(EXPORT_PATH) as f:
+            model_size_kb = json.load(f)['model_size_kb']
+
+    banner("REPORT: GENERATING VISUALIZATIONS")
+
+    def save(name):
+        path = os.path.join(RESULTS_DIR, name)
+        plt.tight_layout()
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"   ✓ Saved: {path}")
+
+    # Training history
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for ax, metric, title in [(axes[0], 'accuracy', 'Model Accuracy'), (axes[1], 'loss', 'Model Loss')]:
+        ax.plot(history[metric], label=f'Training {metric.capitalize()}', linewidth=2)
+        if f'val_{metric}' in history:
+            ax.plot(history[f'val_{metric}'], label=f'Validation {metric.capitalize()}', linewidth=2)
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel('Epoch')
+        ax.set_ylabel(metric.capitalize())
+        ax.legend(fontsize=11)
+        ax.grid(True, alpha=0.3)
+    save('01_training_history.png')
+
+    # Risk distribution
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, labels, title in [(axes[0], y_train, 'Training Set Risk Distribution'),
+                              (axes[1], y_test, 'Test Set Risk Distribution')]:
+        counts = np.bincount(labels, minlength=4)
+        bars = ax.bar(RISK_LABELS, counts, color=RISK_COLORS, alpha=0.8, edgecolor='black')
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_ylabel('Number of Samples')
+        ax.grid(True, alpha=0.3, axis='y')
+        for bar, count in zip(bars, counts):
+            share = count / len(labels) * 100 if len(labels) else 0
+            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 20,
+                    f'{count}\n({share:.1f}%)', ha='center', fontsize=10, fontweight='bold')
+    save('02_risk_distribution.png')
+
+    if len(y_test):
+        # Confusion matrix
+        cm = confusion_matrix(y_test, y_pred, labels=[0, 1, 2, 3])
+        fig, ax = plt.subplots(figsize=(10, 8))
+        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                    xticklabels=RISK_LABELS, yticklabels=RISK_LABELS,
+                    cbar_kws={'label': 'Count'}, ax=ax, annot_kws={'size': 12})
+        ax.set_title('Confusion Matrix - Test Set', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Predicted Label', fontsize=12)
+        ax.set_ylabel('True Label', fontsize=12)
+        save('03_confusion_matrix.png')
+
+        # Per-class metrics
+        class_report = classification_report(y_test, y_pred, output_dict=True, zero_division=0,
+                                             labels=[0, 1, 2, 3], target_names=RISK_LABELS)
+        fig, ax = plt.subplots(figsize=(12, 6))
+        x = np.arange(len(RISK_LABELS))
+        width = 0.25
+        for i, metric in enumerate(['precision', 'recall', 'f1-score']):
+            values = [class_report[label][metric] for label in RISK_LABELS]
+            ax.bar(x + i*width, values, width, label=metric.capitalize(), alpha=0.8)
+        ax.set_title('Per-Class Performance Metrics', fontsize=14, fontweight='bold')
+        ax.set_ylabel('Score')
+        ax.set_xticks(x + width)
+        ax.set_xticklabels(RISK_LABELS)
+        ax.legend(fontsize=11)
+        ax.set_ylim([0, 1.1])
+        ax.grid(True, alpha=0.3, axis='y')
+        save('04_per_class_metrics.png')
+
+    report_path = os.path.join(RESULTS_DIR, '00_MODEL_REPORT.txt')
+    with open(report_path, 'w') as f:
+        f.write("="*80 + "\n")
+        f.write("NUTRITRACK ML MODEL TRAINING REPORT\n")
+        f.write("="*80 + "\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Model variant: {run['variant']}\n\n")
+
+        f.write("MODEL PERFORMANCE METRICS\n")
+        f.write("-"*80 + "\n")
+        for key in ['accuracy', 'val_accuracy', 'loss', 'val_loss']:
+            if key in history:
+                f.write(f"Final {key.replace('val_', 'validation ').replace('_', ' ')}: {history[key][-1]:.4f}\n")
+        if len(y_test):
+            f.write(f"Test Set Accuracy: {accuracy_score(y_test, y_pred):.4f}\n")
+        if model_size_kb is not None:
+            f.write(f"Model Size: {model_size_kb:.2f} KB\n")
+        f.write("\n")
+
+        if len(y_test):
+            f.write("DETAILED CLASSIFICATION REPORT\n")
+            f.write("-"*80 + "\n")
+            f.write(classification_report(y_test, y_pred, labels=[0, 1, 2, 3], zero_division=0,
+                                          target_names=RISK_LABELS) + "\n\n")
+
+            f.write("RISK CATEGORY DISTRIBUTION (TEST SET)\n")
+            f.write("-"*80 + "\n")
+            unique, counts = np.unique(y_test, return_counts=True)
+            for label_idx, count in zip(unique, counts):
+                f.write(f"{RISK_LABELS[label_idx]}: {count} samples ({count/len(y_test)*100:.1f}%)\n")
+
+        f.write("\n" + "="*80 + "\n")
+        f.write("All graphs and metrics saved to: " + RESULTS_DIR + "\n")
+    print(f"   ✓ Saved: {report_path}")
+    return report_path
+
+
+# ---------------------------------------------------------------------------
+# benchmark
+# ---------------------------------------------------------------------------
+
+def _parse_importtime(stderr, after):
+    """Modules imported after `after` finished, from `python -X importtime` output.
+
+    Returns (total seconds, number of modules). Only top-level entries are
+    summed, since a nested entry's time is already in its parent's.
+    """
+    lines = [l for l in stderr.splitlines() if l.startswith('import time:') and '|' in l]
+    names = [l.split('|')[2] for l in lines]
+    start = next((i + 1 for i, n in enumerate(names) if n.strip() == after), len(lines))
+    total = 0.0
+    for line, name in zip(lines[start:], names[start:]):
+        if len(name) - len(name.lstrip()) == 1:  # not nested under another import
+            total += int(line.split('|')[1]) / 1e6
+    return total, len(lines) - start
+
+
+def _run_timed(code, repeat):
+    """Best-of-`repeat` wall time (s) of a fresh interpreter running `code`, plus its stderr."""
+    best, stderr = None, ''
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                              capture_output=True, text=True)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            errors = [l for l in proc.stderr.splitlines() if not l.startswith('import time:')]
+            return None, errors[-1] if errors else 'failed'
+        if best is None or elapsed < best:
+            best, stderr = elapsed, proc.stderr
+    return best, stderr
+
+
+def benchmark(repeat=3):
+    """Startup cost per subcommand, measured on the real lazy_import() path.
+
+    Each subcommand runs `import train_cli; train_cli.lazy_import(<name>)` in
+    a fresh interpreter under `-X importtime`; the import time reported is
+    everything imported after train_cli itself finished loading.
+    """
+    banner("BENCHMARK: STARTUP AND IMPORT TIME PER SUBCOMMAND")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base, _ = _run_timed('pass', repeat)
+    cli_code = f"import sys; sys.path.insert(0, {script_dir!r}); import train_cli"
+    cli, out = _run_timed(cli_code, repeat)
+    print(f"\n{'python (empty)':<16} {base * 1000:8.1f} ms wall")
+    if cli is None:
+        print(f"{'train_cli':<16} failed: {out}")
+        return None
+    print(f"{'train_cli':<16} {cli * 1000:8.1f} ms wall  (+{(cli - base) * 1000:.1f} ms)")
+
+    results = {'python': base, 'train_cli': cli, 'subcommands': {}}
+    for name in SUBCOMMAND_IMPORTS:
+        elapsed, out = _run_timed(cli_code + f"; train_cli.lazy_import({name!r})", repeat)
+        if elapsed is None:
+            results['subcommands'][name] = None
+            print(f"{name:<16} {'n/a':>8}          {out}")
+            continue
+        import_s, count = _parse_importtime(out, 'train_cli')
+        results['subcommands'][name] = {'wall': elapsed, 'imports': import_s, 'modules': count}
+        print(f"{name:<16} {elapsed * 1000:8.1f} ms wall  imports {import_s * 1000:7.1f} ms, "
+              f"{count} modules [{', '.join(SUBCOMMAND_IMPORTS[name]) or '-'}]")
+    return results
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NutriTrack ML training pipeline")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help="combine assets/data/*.csv into the cache")
+    p.add_argument('--force', action='store_true', help="ignore the cached dataset")
+
+    synthetic_help = "fall back to synthetic data if no dataset row has all selected features"
+    p = sub.add_parser('features', help="extract features and labels into the cache")
+    p.add_argument('--force', action='store_true', help="ignore the cached features")
+    p.add_argument('--allow-synthetic', action='store_true', help=synthetic_help)
+
+    p = sub.add_parser('train', help="train the Keras classifier")
+    p.add_argument('--model', choices=['simple', 'detailed'], default='simple')
+    p.add_argument('--epochs', type=int, default=20)
+    p.add_argument('--batch-size', type=int, default=32)
+    p.add_argument('--validation-split', type=float, default=0.15)
+    p.add_argument('--test-size', type=float, default=0.2,
+                   help="held-out test fraction for `report` (0 trains on everything)")
+    p.add_argument('--allow-synthetic', action='store_true', help=synthetic_help)
+
+    sub.add_parser('export-tflite', help="convert the trained model to model.tflite")
+    sub.add_parser('report', help="write graphs and a text report to outputs/training_results/")
+
+    p = sub.add_parser('benchmark', help="measure import time per subcommand")
+    p.add_argument('--repeat', type=int, default=3)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    os.makedirs(OUT_DIR, exist_ok=True)
+    if args.command == 'ingest':
+        ingest(force=args.force)
+    elif args.command == 'features':
+        features(force=args.force, allow_synthetic=args.allow_synthetic)
+    elif args.command == 'train':
+        train(args.model, args.epochs, args.batch_size, args.validation_split, args.test_size,
+              args.allow_synthetic)
+    elif args.command == 'export-tflite':
+        export_tflite()
+    elif args.command == 'report':
+        report()
+    elif args.command == 'benchmark':
+        benchmark(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
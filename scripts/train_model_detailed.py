@@ -5,440 +5,25 @@ This script trains the NutriTrack ML model using real health datasets and genera
 - Training/validation accuracy graphs
 - Loss curves
 - Confusion matrices
-- Feature importance analysis
 - Risk distribution charts
 - Model performance metrics
 - All saved as high-quality PNG files for reports
 
+Equivalent to `train_cli.py train --model detailed --epochs 30 --validation-split 0.2`
+followed by `train_cli.py export-tflite` and `train_cli.py report`.
+
 Output files saved to: outputs/training_results/
 """
-import os
-import numpy as np
-import pandas as pd
-import tensorflow as tf
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
-from glob import glob
-from datetime import datetime
-
-# Configuration
-OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'assets', 'models')
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'assets', 'data')
-RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'outputs', 'training_results')
-
-os.makedirs(OUT_DIR, exist_ok=True)
-os.makedirs(RESULTS_DIR, exist_ok=True)
-
-# Setup visualization style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
-
-RISK_LABELS = ['Normal', 'Moderate', 'High', 'Severe']
-RISK_COLORS = ['#2ecc71', '#f39c12', '#e74c3c', '#c0392b']
-
-def load_real_data():
-    """Load and combine all CSV datasets from assets/data/"""
-    print("\n" + "="*70)
-    print("STEP 1: LOADING REAL DATASETS")
-    print("="*70)
-    
-    all_data = []
-    csv_files = sorted(glob(os.path.join(DATA_DIR, '*.csv')))
-    
-    print(f"\nFound {len(csv_files)} CSV files:")
-    for i, f in enumerate(csv_files, 1):
-        print(f"  {i}. {os.path.basename(f)}")
-    
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            print(f"     ✓ Loaded: {len(df)} rows, {len(df.columns)} columns")
-            all_data.append(df)
-        except Exception as e:
-            print(f"     ✗ Error: {e}")
-    
-    if not all_data:
-        print("\n⚠ No CSV files found. Using synthetic data fallback...")
-        return gen_synthetic_data(2000)
-    
-    # Combine all dataframes
-    combined_df = pd.concat(all_data, ignore_index=True, sort=False)
-    print(f"\n✓ Combined dataset: {len(combined_df)} rows, {len(combined_df.columns)} columns")
-    
-    return extract_features_from_real_data(combined_df)
-
-def extract_features_from_real_data(df):
-    """Extract features from real health datasets and generate labels"""
-    print("\n" + "="*70)
-    print("STEP 2: FEATURE EXTRACTION")
-    print("="*70)
-    
-    # Get numeric columns
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    
-    if len(numeric_cols) < 5:
-        print(f"\n⚠ Only {len(numeric_cols)} numeric columns found. Using synthetic data...")
-        return gen_synthetic_data(2000)
-    
-    selected_cols = numeric_cols[:5]
-    print(f"\nSelected features ({len(selected_cols)}):")
-    for i, col in enumerate(selected_cols, 1):
-        print(f"  {i}. {col}")
-    
-    X = df[selected_cols].dropna().values.astype(np.float32)
-    
-    print(f"\nOriginal data shape: {X.shape}")
-    print(f"Feature statistics:")
-    for i, col in enumerate(selected_cols):
-        print(f"  {col}: min={X[:, i].min():.2f}, max={X[:, i].max():.2f}, mean={X[:, i].mean():.2f}")
-    
-    # Normalize features
-    X_normalized = np.zeros_like(X)
-    for i in range(X.shape[1]):
-        col_min, col_max = X[:, i].min(), X[:, i].max()
-        if col_max > col_min:
-            X_normalized[:, i] = 1 + 19 * (X[:, i] - col_min) / (col_max - col_min)
-        else:
-            X_normalized[:, i] = 10
-    
-    # Generate labels
-    y = generate_labels_from_features(X_normalized)
-    
-    print(f"\nNormalized data shape: {X_normalized.shape}")
-    return X_normalized, y
-
-def generate_labels_from_features(X):
-    """Generate risk labels from feature values"""
-    n = X.shape[0]
-    y = np.zeros(n, dtype=np.int32)
-    
-    for i in range(n):
-        feature_avg = np.mean(X[i])
-        
-        if feature_avg < 5:
-            y[i] = 3  # Severe
-        elif feature_avg < 8:
-            y[i] = 2  # High
-        elif feature_avg < 12:
-            y[i] = 1  # Moderate
-        else:
-            y[i] = 0  # Normal
-    
-    return y
-
-def gen_synthetic_data(n=2000):
-    """Fallback: Generate synthetic example data"""
-    print("\nGenerating synthetic training data...")
-    weight = np.random.normal(10.0, 2.5, size=n)
-    height = np.random.normal(80.0, 8.0, size=n)
-    muac = np.random.normal(13.0, 1.5, size=n)
-    hb = np.random.normal(11.5, 1.5, size=n)
-    meals = np.random.randint(2, 6, size=n)
+from train_cli import RESULTS_DIR, banner, train, export_tflite, report
 
-    X = np.stack([weight, height, muac, hb, meals], axis=1).astype(np.float32)
-
-    y = np.zeros((n,), dtype=np.int32)
-    for i in range(n):
-        if muac[i] < 11.5 or hb[i] < 7.0:
-            y[i] = 3
-        elif muac[i] < 12.5 or (weight[i] / (height[i]/100) < 10):
-            y[i] = 2
-        elif hb[i] < 11.0 or meals[i] < 3:
-            y[i] = 1
-        else:
-            y[i] = 0
-
-    return X, y
-
-def build_model(input_shape):
-    """Build neural network model"""
-    model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(input_shape,)),
-        tf.keras.layers.Dense(64, activation='relu', name='dense_1'),
-        tf.keras.layers.Dropout(0.3),
-        tf.keras.layers.Dense(32, activation='relu', name='dense_2'),
-        tf.keras.layers.Dropout(0.2),
-        tf.keras.layers.Dense(16, activation='relu', name='dense_3'),
-        tf.keras.layers.Dense(4, activation='softmax', name='output')
-    ])
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-        loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
-    )
-    return model
-
-def plot_training_history(history):
-    """Plot training and validation metrics"""
-    print("\n📊 Generating training history graphs...")
-    
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-    
-    # Accuracy plot
-    axes[0].plot(history.history['accuracy'], label='Training Accuracy', linewidth=2)
-    axes[0].plot(history.history['val_accuracy'], label='Validation Accuracy', linewidth=2)
-    axes[0].set_title('Model Accuracy', fontsize=14, fontweight='bold')
-    axes[0].set_xlabel('Epoch')
-    axes[0].set_ylabel('Accuracy')
-    axes[0].legend(fontsize=11)
-    axes[0].grid(True, alpha=0.3)
-    
-    # Loss plot
-    axes[1].plot(history.history['loss'], label='Training Loss', linewidth=2)
-    axes[1].plot(history.history['val_loss'], label='Validation Loss', linewidth=2)
-    axes[1].set_title('Model Loss', fontsize=14, fontweight='bold')
-    axes[1].set_xlabel('Epoch')
-    axes[1].set_ylabel('Loss')
-    axes[1].legend(fontsize=11)
-    axes[1].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    path = os.path.join(RESULTS_DIR, '01_training_history.png')
-    plt.savefig(path, dpi=300, bbox_inches='tight')
-    print(f"   ✓ Saved: {path}")
-    plt.close()
-
-def plot_risk_distribution(y_train, y_test):
-    """Plot risk category distribution"""
-    print("\n📊 Generating risk distribution charts...")
-    
-    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-    
-    train_counts = np.bincount(y_train, minlength=4)
-    test_counts = np.bincount(y_test, minlength=4)
-    
-    # Training set
-    bars1 = axes[0].bar(RISK_LABELS, train_counts, color=RISK_COLORS, alpha=0.8, edgecolor='black')
-    axes[0].set_title('Training Set Risk Distribution', fontsize=14, fontweight='bold')
-    axes[0].set_ylabel('Number of Samples')
-    axes[0].grid(True, alpha=0.3, axis='y')
-    for bar, count in zip(bars1, train_counts):
-        axes[0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 20, 
-                     f'{count}\n({count/len(y_train)*100:.1f}%)', 
-                     ha='center', fontsize=10, fontweight='bold')
-    
-    # Test set
-    bars2 = axes[1].bar(RISK_LABELS, test_counts, color=RISK_COLORS, alpha=0.8, edgecolor='black')
-    axes[1].set_title('Test Set Risk Distribution', fontsize=14, fontweight='bold')
-    axes[1].set_ylabel('Number of Samples')
-    axes[1].grid(True, alpha=0.3, axis='y')
-    for bar, count in zip(bars2, test_counts):
-        axes[1].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 20,
-                     f'{count}\n({count/len(y_test)*100:.1f}%)',
-                     ha='center', fontsize=10, fontweight='bold')
-    
-    plt.tight_layout()
-    path = os.path.join(RESULTS_DIR, '02_risk_distribution.png')
-    plt.savefig(path, dpi=300, bbox_inches='tight')
-    print(f"   ✓ Saved: {path}")
-    plt.close()
-
-def plot_confusion_matrix(y_true, y_pred):
-    """Plot confusion matrix"""
-    print("\n📊 Generating confusion matrix...")
-    
-    cm = confusion_matrix(y_true, y_pred, labels=[0, 1, 2, 3])
-    
-    fig, ax = plt.subplots(figsize=(10, 8))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=RISK_LABELS, yticklabels=RISK_LABELS,
-                cbar_kws={'label': 'Count'}, ax=ax, annot_kws={'size': 12})
-    
-    ax.set_title('Confusion Matrix - Test Set', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Predicted Label', fontsize=12)
-    ax.set_ylabel('True Label', fontsize=12)
-    
-    plt.tight_layout()
-    path = os.path.join(RESULTS_DIR, '03_confusion_matrix.png')
-    plt.savefig(path, dpi=300, bbox_inches='tight')
-    print(f"   ✓ Saved: {path}")
-    plt.close()
-
-def plot_per_class_metrics(y_true, y_pred):
-    """Plot per-class precision, recall, F1-score"""
-    print("\n📊 Generating per-class metrics...")
-    
-    report = classification_report(y_true, y_pred, output_dict=True, 
-                                   labels=[0, 1, 2, 3], target_names=RISK_LABELS)
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    
-    metrics = ['precision', 'recall', 'f1-score']
-    x = np.arange(len(RISK_LABELS))
-    width = 0.25
-    
-    for i, metric in enumerate(metrics):
-        values = [report[label][metric] for label in RISK_LABELS]
-        ax.bar(x + i*width, values, width, label=metric.capitalize(), alpha=0.8)
-    
-    ax.set_title('Per-Class Performance Metrics', fontsize=14, fontweight='bold')
-    ax.set_ylabel('Score')
-    ax.set_xticks(x + width)
-    ax.set_xticklabels(RISK_LABELS)
-    ax.legend(fontsize=11)
-    ax.set_ylim([0, 1.1])
-    ax.grid(True, alpha=0.3, axis='y')
-    
-    plt.tight_layout()
-    path = os.path.join(RESULTS_DIR, '04_per_class_metrics.png')
-    plt.savefig(path, dpi=300, bbox_inches='tight')
-    print(f"   ✓ Saved: {path}")
-    plt.close()
-
-def generate_report_summary(history, y_test, y_pred, model_size_kb):
-    """Generate text report with all metrics"""
-    print("\n📄 Generating report summary...")
-    
-    report_path = os.path.join(RESULTS_DIR, '00_MODEL_REPORT.txt')
-    
-    with open(report_path, 'w') as f:
-        f.write("="*80 + "\n")
-        f.write("NUTRITRACK ML MODEL TRAINING REPORT\n")
-        f.write("="*80 + "\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        # Model metrics
-        f.write("MODEL PERFORMANCE METRICS\n")
-        f.write("-"*80 + "\n")
-        f.write(f"Final Training Accuracy: {history.history['accuracy'][-1]:.4f}\n")
-        f.write(f"Final Validation Accuracy: {history.history['val_accuracy'][-1]:.4f}\n")
-        f.write(f"Final Training Loss: {history.history['loss'][-1]:.4f}\n")
-        f.write(f"Final Validation Loss: {history.history['val_loss'][-1]:.4f}\n")
-        f.write(f"Test Set Accuracy: {accuracy_score(y_test, y_pred):.4f}\n")
-        f.write(f"Model Size: {model_size_kb:.2f} KB\n\n")
-        
-        # Classification report
-        f.write("DETAILED CLASSIFICATION REPORT\n")
-        f.write("-"*80 + "\n")
-        f.write(classification_report(y_test, y_pred, target_names=RISK_LABELS) + "\n\n")
-        
-        # Risk distribution
-        f.write("RISK CATEGORY DISTRIBUTION (TEST SET)\n")
-        f.write("-"*80 + "\n")
-        unique, counts = np.unique(y_test, return_counts=True)
-        for label_idx, count in zip(unique, counts):
-            f.write(f"{RISK_LABELS[label_idx]}: {count} samples ({count/len(y_test)*100:.1f}%)\n")
-        
-        f.write("\n" + "="*80 + "\n")
-        f.write("Training completed successfully!\n")
-        f.write("All graphs and metrics saved to: " + RESULTS_DIR + "\n")
-    
-    print(f"   ✓ Saved: {report_path}")
 
 def main():
-    print("\n" + "█"*70)
-    print("█" + " "*68 + "█")
-    print("█" + "  NUTRITRACK ML MODEL - DETAILED TRAINING WITH ANALYSIS".center(68) + "█")
-    print("█" + " "*68 + "█")
-    print("█"*70)
-    
-    # Load data
-    X, y = load_real_data()
-    
-    print("\n" + "="*70)
-    print("STEP 3: DATA SPLIT")
-    print("="*70)
-    
-    # Split data
-    from sklearn.model_selection import train_test_split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    print(f"\nTraining set: {X_train.shape[0]} samples")
-    print(f"Test set: {X_test.shape[0]} samples")
-    
-    # Plot risk distribution
-    plot_risk_distribution(y_train, y_test)
-    
-    # Build model
-    print("\n" + "="*70)
-    print("STEP 4: MODEL ARCHITECTURE")
-    print("="*70)
-    
-    model = build_model(X.shape[1])
-    print("\nModel Summary:")
-    model.summary()
-    
-    # Train model
-    print("\n" + "="*70)
-    print("STEP 5: TRAINING")
-    print("="*70 + "\n")
-    
-    history = model.fit(
-        X_train, y_train,
-        epochs=30,
-        batch_size=32,
-        validation_split=0.2,
-        verbose=1
-    )
-    
-    # Evaluate
-    print("\n" + "="*70)
-    print("STEP 6: EVALUATION")
-    print("="*70)
-    
-    train_loss, train_acc = model.evaluate(X_train, y_train, verbose=0)
-    test_loss, test_acc = model.evaluate(X_test, y_test, verbose=0)
-    
-    print(f"\nTraining - Loss: {train_loss:.4f}, Accuracy: {train_acc:.4f}")
-    print(f"Test     - Loss: {test_loss:.4f}, Accuracy: {test_acc:.4f}")
-    
-    # Get predictions
-    y_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
-    
-    # Generate visualizations
-    print("\n" + "="*70)
-    print("STEP 7: GENERATING VISUALIZATIONS")
-    print("="*70)
-    
-    plot_training_history(history)
-    plot_confusion_matrix(y_test, y_pred)
-    plot_per_class_metrics(y_test, y_pred)
-    
-    # Convert to TFLite
-    print("\n" + "="*70)
-    print("STEP 8: CONVERTING TO TFLITE")
-    print("="*70)
-    
-    saved = os.path.join(OUT_DIR, 'saved_model')
-    model.save(saved, include_optimizer=False)
-    print(f"\n✓ Saved TensorFlow model to {saved}")
-    
-    converter = tf.lite.TFLiteConverter.from_saved_model(saved)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    
-    try:
-        tflite_model = converter.convert()
-    except Exception as e:
-        print(f"Conversion note: {e}. Using basic conversion...")
-        converter = tf.lite.TFLiteConverter.from_saved_model(saved)
-        tflite_model = converter.convert()
-    
-    tflite_path = os.path.join(OUT_DIR, 'model.tflite')
-    with open(tflite_path, 'wb') as f:
-        f.write(tflite_model)
-    
-    model_size_kb = os.path.getsize(tflite_path) / 1024
-    print(f"✓ Saved TFLite model: {tflite_path}")
-    print(f"  Size: {model_size_kb:.2f} KB")
-    
-    # Save labels
-    labels_path = os.path.join(OUT_DIR, 'labels.txt')
-    with open(labels_path, 'w') as f:
-        f.write('\n'.join(RISK_LABELS))
-    print(f"✓ Saved labels: {labels_path}")
-    
-    # Generate report
-    generate_report_summary(history, y_test, y_pred, model_size_kb)
-    
-    print("\n" + "█"*70)
-    print("█" + " "*68 + "█")
-    print("█" + "  ✓ TRAINING COMPLETE - Ready for deployment!".center(68) + "█")
-    print("█" + " "*68 + "█")
-    print("█"*70)
-    
+    banner("NUTRITRACK ML MODEL - DETAILED TRAINING WITH ANALYSIS")
+    train(variant='detailed', epochs=30, batch_size=32, validation_split=0.2, test_size=0.2)
+    export_tflite()
+    report()
+    banner("✓ TRAINING COMPLETE - Ready for deployment!")
+
     print(f"\n📁 Results saved to: {RESULTS_DIR}")
     print("\n📊 Generated files:")
     print("   • 00_MODEL_REPORT.txt - Detailed metrics and summary")